@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+历史开奖数据回填
+按期号区间（issueStart/issueEnd）分块，从中国福彩网并发获取全部历史开奖并写入本地存储：
+福彩3D 自 2004 年起，双色球自 2003 年起。
+所有请求（含重试）共用一个令牌桶限流；每批数据与其区间检查点在同一事务中写入，
+中断后重新运行会跳过已完成的区间
+
+用法: python backfill.py [--games fc3d,ssq] [--workers 8] [--rate 5] [--chunk-size 100]
+"""
+
+import argparse
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from itertools import chain
+
+from real_server import DRAW_TABLES, DrawStore, RealLotteryDataScraper, TokenBucket, store
+
+logger = logging.getLogger('backfill')
+
+# 各彩种第一期所在年份
+START_YEARS = {'fc3d': 2004, 'ssq': 2003}
+# 每年期号序号上限（福彩3D 每日开奖，双色球每周三期）
+MAX_PERIODS_PER_YEAR = {'fc3d': 366, 'ssq': 160}
+
+GAME_LABELS = {'fc3d': '福彩3D', 'ssq': '双色球'}
+
+def period_chunks(game, chunk_size, until_year=None):
+    """把期号空间按年份和 chunk_size 切分为 [(起始期号, 结束期号)]"""
+    until_year = until_year or datetime.now().year
+    chunks = []
+    for year in range(START_YEARS[game], until_year + 1):
+        for first in range(1, MAX_PERIODS_PER_YEAR[game] + 1, chunk_size):
+            last = min(first + chunk_size - 1, MAX_PERIODS_PER_YEAR[game])
+            chunks.append((f'{year}{first:03d}', f'{year}{last:03d}'))
+    return chunks
+
+def backfill(scraper, game, chunk_size=100, workers=8, batch_size=2000, restart=False):
+    """回填单个彩种，返回 (新增期数, 失败的区间)"""
+    label = GAME_LABELS[game]
+    table_cls = DRAW_TABLES[game]
+    if restart:
+        scraper.store.clear_checkpoints(game)
+
+    # 当年的区间可能还会有新开奖，不记检查点，每次都重新获取
+    current_year = str(datetime.now().year)
+    done = scraper.store.checkpoints(game)
+    chunks = [c for c in period_chunks(game, chunk_size) if c[0] not in done]
+    logger.info(f"{label}: 共 {len(chunks)} 个区间待获取，已完成 {len(done)} 个")
+
+    added = 0
+    failed = []
+    batch = []
+    checkpoints = []
+
+    def flush():
+        nonlocal added
+        if not batch and not checkpoints:
+            return
+        table = table_cls.from_rows(chain.from_iterable(t.rows() for t in batch))
+        added += scraper.store.upsert(game, table, checkpoints)
+        batch.clear()
+        checkpoints.clear()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='backfill') as pool:
+        futures = {pool.submit(scraper.fetch_range, game, start, end): (start, end) for start, end in chunks}
+        for i, future in enumerate(as_completed(futures), 1):
+            start, end = futures[future]
+            try:
+                data = future.result()
+            except Exception as e:
+                logger.error(f"{label} {start}-{end} 获取失败: {e}")
+                data = None
+            if data is None:
+                # 请求失败或响应无效（截断、state 非 0），不记检查点，下次运行重新获取
+                failed.append((start, end))
+                continue
+
+            batch.append(data)
+            # 空区间重新获取的代价很小，不记检查点，避免把异常的空结果永久标记为已完成
+            if len(data) and not start.startswith(current_year):
+                checkpoints.append((start, end, len(data)))
+            if sum(len(t) for t in batch) >= batch_size:
+                flush()
+            if i % 20 == 0:
+                logger.info(f"{label}: {i}/{len(chunks)} 个区间完成")
+    flush()
+    return added, failed
+
+def main():
+    parser = argparse.ArgumentParser(description='从中国福彩网回填全部历史开奖数据')
+    parser.add_argument('--games', default='fc3d,ssq', help='彩种，逗号分隔')
+    parser.add_argument('--db', help='SQLite 数据库路径（默认同 LOTTERY_DB_PATH）')
+    parser.add_argument('--workers', type=int, default=8, help='并发请求数')
+    parser.add_argument('--rate', type=float, default=5, help='每秒请求数上限（全局，含重试）')
+    parser.add_argument('--burst', type=int, help='允许的突发请求数（默认同 --rate）')
+    parser.add_argument('--chunk-size', type=int, default=100, help='每个请求的期号区间长度')
+    parser.add_argument('--batch-size', type=int, default=2000, help='每次写入数据库的期数')
+    parser.add_argument('--restart', action='store_true', help='忽略检查点，全部重新获取')
+    args = parser.parse_args()
+
+    scraper = RealLotteryDataScraper(DrawStore(args.db) if args.db else store)
+    scraper.rate_limiter = TokenBucket(args.rate, args.burst)
+
+    print(f"📥 开始回填历史开奖数据，并发 {args.workers}，限流 {args.rate} 次/秒")
+    exit_code = 0
+    for game in args.games.split(','):
+        started = time.perf_counter()
+        added, failed = backfill(scraper, game, args.chunk_size, args.workers, args.batch_size, args.restart)
+        elapsed = time.perf_counter() - started
+        print(f"✅ {GAME_LABELS[game]}: 新增 {added} 期，本地共 {scraper.store.count(game)} 期，用时 {elapsed:.1f} 秒")
+        if failed:
+            exit_code = 1
+            print(f"⚠️ {len(failed)} 个区间获取失败，重新运行即可从检查点继续: "
+                  + ', '.join(f'{s}-{e}' for s, e in failed[:10]) + (' ...' if len(failed) > 10 else ''))
+    print("💡 服务器运行中时，调用 /api/clear_cache 让其重新加载本地数据")
+    return exit_code
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+接口并发负载测试
+并发请求 /api/fc3d 和 /api/ssq，统计吞吐量和 p50/p99 延迟。
+默认在本进程内启动服务器，上游数据由 fixtures 回放或来自 --upstream 指定的替身服务器；
+也可用 --url 指向已启动的服务器（如 gunicorn）
+
+用法: python benchmarks/bench_load.py [--requests 2000] [--concurrency 16] [--url http://127.0.0.1:5000]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('LOTTERY_DB_PATH', os.path.join(tempfile.mkdtemp(prefix='lottery-bench-'), 'draws.db'))
+
+import requests
+
+from fixtures import FixtureSession
+from results import report
+
+DEFAULT_PATHS = ['/api/fc3d?limit=300', '/api/ssq?limit=300']
+
+def start_local_server(count, upstream=None):
+    """在后台线程启动服务器，上游请求由 FixtureSession 回放或发往 upstream 替身服务器；返回基础 URL"""
+    from werkzeug.serving import make_server
+    import real_server
+
+    if upstream:
+        real_server.scraper.cwl_base = real_server.scraper.zhcw_base = upstream.rstrip('/')
+    else:
+        real_server.scraper.session = FixtureSession(count)
+    # 逐条请求日志会明显拖慢服务器
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, real_server.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='bench-server', daemon=True).start()
+    return f'http://127.0.0.1:{server.server_port}'
+
+def percentile(sorted_values, p):
+    """最近秩百分位数"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def run_load(url, total, concurrency):
+    """并发发送 total 个请求，返回 (延迟列表（秒）, 失败数, 总耗时)"""
+    local = threading.local()
+
+    def fetch(_):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            response = session.get(url, timeout=30)
+            response.content
+            ok = response.status_code == 200
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(fetch, range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, ok in outcomes if ok)
+    failures = sum(1 for _, ok in outcomes if not ok)
+    return latencies, failures, elapsed
+
+def bench_load(base_url, paths, total, concurrency):
+    results = {}
+    for path in paths:
+        url = base_url + path
+        # 预热：触发首次加载，之后的请求都命中缓存
+        requests.get(url, timeout=60)
+        latencies, failures, elapsed = run_load(url, total, concurrency)
+        name = path.split('?')[0]
+        results[f'{name}_rps'] = (total - failures) / elapsed
+        results[f'{name}_p50_ms'] = percentile(latencies, 50) * 1000
+        results[f'{name}_p99_ms'] = percentile(latencies, 99) * 1000
+        print(f"  {path}: {results[f'{name}_rps']:.0f} req/s, "
+              f"p50 {results[f'{name}_p50_ms']:.2f} ms, p99 {results[f'{name}_p99_ms']:.2f} ms, "
+              f"失败 {failures}")
+        if failures:
+            print(f"  ⚠️ {path} 有 {failures} 个请求失败")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='接口并发负载测试')
+    parser.add_argument('--url', help='已启动服务器的地址；不指定时在本进程内启动')
+    parser.add_argument('--paths', default=','.join(DEFAULT_PATHS), help='测试的接口路径，逗号分隔')
+    parser.add_argument('--requests', type=int, default=2000, help='每个接口的请求数')
+    parser.add_argument('--concurrency', type=int, default=16, help='并发数')
+    parser.add_argument('--draws', type=int, default=3000, help='本地服务器回放的开奖期数')
+    parser.add_argument('--upstream', help='本地服务器的上游地址（benchmarks/fake_upstream.py）；不指定时在进程内回放')
+    parser.add_argument('--threshold', type=float, default=0.1, help='超过上次结果该比例视为退化')
+    parser.add_argument('--no-save', action='store_true', help='只对比，不保存本次结果')
+    parser.add_argument('--fail-on-regression', action='store_true', help='有退化时以非零状态退出')
+    args = parser.parse_args()
+
+    base_url = args.url.rstrip('/') if args.url else start_local_server(args.draws, args.upstream)
+    paths = [p for p in args.paths.split(',') if p]
+    print(f"🚦 负载测试 {base_url}，每个接口 {args.requests} 个请求，并发 {args.concurrency}")
+    results = bench_load(base_url, paths, args.requests, args.concurrency)
+
+    # 本地服务器与外部服务器的结果不可比，分开记录
+    suite = 'load' if not args.url else f'load:{base_url}'
+    regressions = report(suite, results, args.threshold, save=not args.no_save)
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
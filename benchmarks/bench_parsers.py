@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+解析函数基准测试
+对每个 _parse_* 函数在 300 / 3000 / 10000 期的 cwl JSON 和中彩网 HTML 上计时，
+中彩网页面分别测试各 HTML 解析后端
+
+用法: python benchmarks/bench_parsers.py [--sizes 300,3000,10000] [--fail-on-regression]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 基准测试不应写入项目目录下的数据库
+os.environ.setdefault('LOTTERY_DB_PATH', os.path.join(tempfile.mkdtemp(prefix='lottery-bench-'), 'draws.db'))
+
+from fixtures import FixtureResponse, cwl_json, synthetic_draws, zhcw_html
+from results import report
+import real_server
+
+def time_call(fn, min_time=0.2, repeat=5):
+    """返回单次调用的最短耗时（毫秒）"""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1000
+
+def bench_parsers(sizes):
+    scraper = real_server.RealLotteryDataScraper()
+    backends = {}
+    for name, parser_cls in real_server.HTML_PARSERS.items():
+        try:
+            backends[name] = parser_cls()
+        except ImportError:
+            print(f"  ⏭️ HTML 解析后端 {name} 不可用，跳过")
+
+    results = {}
+    for game in ('fc3d', 'ssq'):
+        parse_cwl = getattr(scraper, f'_parse_{game}_from_cwl_api')
+        parse_zhcw = getattr(scraper, f'_parse_{game}_from_zhcw_html')
+        for size in sizes:
+            draws = synthetic_draws(game, size)
+            cwl_response = FixtureResponse(cwl_json(draws))
+            zhcw_response = FixtureResponse(zhcw_html(game, draws))
+
+            assert len(parse_cwl(cwl_response)) == size
+            key = f'{parse_cwl.__name__}[{size}]_ms'
+            results[key] = time_call(lambda: parse_cwl(cwl_response))
+            print(f"  {key}: {results[key]:.3f}")
+
+            for name, parser in backends.items():
+                scraper.html_parser = parser
+                assert len(parse_zhcw(zhcw_response)) == size
+                key = f'{parse_zhcw.__name__}[{name},{size}]_ms'
+                results[key] = time_call(lambda: parse_zhcw(zhcw_response))
+                print(f"  {key}: {results[key]:.3f}")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='解析函数基准测试')
+    parser.add_argument('--sizes', default='300,3000,10000', help='开奖期数，逗号分隔')
+    parser.add_argument('--threshold', type=float, default=0.1, help='超过上次结果该比例视为退化')
+    parser.add_argument('--no-save', action='store_true', help='只对比，不保存本次结果')
+    parser.add_argument('--fail-on-regression', action='store_true', help='有退化时以非零状态退出')
+    args = parser.parse_args()
+
+    sizes = [int(x) for x in args.sizes.split(',')]
+    print(f"🔬 解析函数基准测试，期数: {sizes}")
+    results = bench_parsers(sizes)
+    regressions = report('parsers', results, args.threshold, save=not args.no_save)
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+上游同步基准测试
+在注入故障的上游替身服务器下反复执行全量同步，统计同步耗时分布和失败次数，
+观察重试、对冲请求、熔断和备用源回退在慢速或不稳定上游下的表现
+
+用法:
+    python benchmarks/bench_sync.py --rounds 20 --faults '{"cwl": {"timeout_rate": 0.3, "timeout_seconds": 20}}'
+    python benchmarks/bench_sync.py --upstream http://127.0.0.1:8800
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('LOTTERY_DB_PATH', os.path.join(tempfile.mkdtemp(prefix='lottery-bench-'), 'draws.db'))
+
+from fake_upstream import FakeUpstream, start_fake_upstream
+from bench_load import percentile
+from results import report
+import real_server
+
+def bench_sync(base_url, rounds, games):
+    scraper = real_server.RealLotteryDataScraper(cwl_base=base_url, zhcw_base=base_url)
+    workdir = tempfile.mkdtemp(prefix='lottery-sync-')
+    results = {}
+    for game in games:
+        sync = getattr(scraper, f'sync_{game}')
+        durations = []
+        failures = 0
+        for i in range(rounds):
+            # 每轮使用空的本地存储，执行一次全量同步
+            scraper.store = real_server.DrawStore(os.path.join(workdir, f'{game}-{i}.db'))
+            start = time.perf_counter()
+            added = sync()
+            durations.append(time.perf_counter() - start)
+            if not added:
+                failures += 1
+        durations.sort()
+        results[f'sync_{game}_p50_ms'] = percentile(durations, 50) * 1000
+        results[f'sync_{game}_p99_ms'] = percentile(durations, 99) * 1000
+        results[f'sync_{game}_failures'] = failures
+        print(f"  {game}: p50 {results[f'sync_{game}_p50_ms']:.0f} ms, "
+              f"p99 {results[f'sync_{game}_p99_ms']:.0f} ms, 失败 {failures}/{rounds}")
+    print(f"  熔断器: {json.dumps(scraper.breaker_states(), ensure_ascii=False)}")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='上游同步基准测试')
+    parser.add_argument('--upstream', help='已启动的替身服务器地址；不指定时在本进程内启动')
+    parser.add_argument('--faults', default='{}', help='进程内替身服务器的故障配置（JSON，同 /__faults）')
+    parser.add_argument('--rounds', type=int, default=10, help='每个彩种的同步次数')
+    parser.add_argument('--games', default='fc3d,ssq')
+    parser.add_argument('--draws', type=int, default=300, help='替身服务器生成的开奖期数')
+    parser.add_argument('--threshold', type=float, default=0.1, help='超过上次结果该比例视为退化')
+    parser.add_argument('--no-save', action='store_true', help='只对比，不保存本次结果')
+    parser.add_argument('--fail-on-regression', action='store_true', help='有退化时以非零状态退出')
+    args = parser.parse_args()
+
+    faults = json.loads(args.faults)
+    if args.upstream:
+        base_url = args.upstream.rstrip('/')
+    else:
+        upstream = FakeUpstream(args.draws, seed=0)
+        for source, fields in faults.items():
+            upstream.profiles[source].update(**fields)
+        _, base_url = start_fake_upstream(upstream)
+
+    print(f"🔁 同步基准测试 {base_url}，fetch_mode={real_server.scraper.fetch_mode}，每个彩种 {args.rounds} 轮")
+    results = bench_sync(base_url, args.rounds, args.games.split(','))
+
+    # 不同故障配置的结果分开记录
+    suite = f'sync:{args.upstream}' if args.upstream else f'sync:{json.dumps(faults, sort_keys=True)}'
+    regressions = report(suite, results, args.threshold, save=not args.no_save)
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+回填回归检查
+在按比例返回截断响应体的上游替身服务器下重复运行 backfill.py 的回填，
+检查本地存储最终包含替身服务器的全部开奖、且没有 0 期的检查点（截断响应不能被当作空区间记为完成）
+
+用法: python benchmarks/check_backfill.py [--draws 3000] [--truncate-rate 0.3]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('LOTTERY_DB_PATH', os.path.join(tempfile.mkdtemp(prefix='lottery-bench-'), 'draws.db'))
+
+from fake_upstream import FakeUpstream, start_fake_upstream
+import real_server
+from backfill import backfill
+
+def check_backfill(base_url, upstream, games, max_runs, workers):
+    store = real_server.DrawStore(os.path.join(tempfile.mkdtemp(prefix='lottery-backfill-'), 'draws.db'))
+    scraper = real_server.RealLotteryDataScraper(store, cwl_base=base_url, zhcw_base=base_url)
+    # 这里检查的是数据完整性：关闭重试等待和熔断，失败的区间留给下一轮运行
+    scraper.retry_delay = scraper.max_retry_delay = 0
+    scraper.breakers['cwl'].failure_threshold = float('inf')
+
+    ok = True
+    for game in games:
+        expected = {d['code'] for d in upstream.draws[game]}
+        # 没有开奖的区间不记检查点、每轮都会重新请求，截断比例较高时总会有少量失败；
+        # 以上游的开奖是否全部落库为准
+        for run in range(1, max_runs + 1):
+            added, failed = backfill(scraper, game, chunk_size=50, workers=workers)
+            missing = expected - {str(period) for period, *_ in store.load(game).rows()}
+            print(f"  {game} 第 {run} 轮: 新增 {added} 期，失败 {len(failed)} 个区间，缺失 {len(missing)} 期")
+            if not missing:
+                break
+
+        with store._lock:
+            empty = store._conn.execute(
+                'SELECT COUNT(*) FROM backfill_checkpoints WHERE game = ? AND rows = 0', (game,)
+            ).fetchone()[0]
+        print(f"  {game}: 上游 {len(expected)} 期，本地 {store.count(game)} 期，0 期检查点 {empty} 个")
+        if missing or empty:
+            ok = False
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description='截断响应下的回填回归检查')
+    parser.add_argument('--draws', type=int, default=3000, help='替身服务器生成的开奖期数')
+    parser.add_argument('--truncate-rate', type=float, default=0.3, help='中国福彩网返回截断响应体的比例')
+    parser.add_argument('--games', default='fc3d,ssq')
+    parser.add_argument('--runs', type=int, default=10, help='最多重复运行回填的次数')
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    # 截断响应会产生大量预期内的解析错误日志
+    logging.getLogger().setLevel(logging.CRITICAL)
+    upstream = FakeUpstream(args.draws, seed=0)
+    upstream.profiles['cwl'].update(truncate_rate=args.truncate_rate)
+    _, base_url = start_fake_upstream(upstream)
+
+    print(f"🧩 回填检查 {base_url}，截断比例 {args.truncate_rate}")
+    if not check_backfill(base_url, upstream, args.games.split(','), args.runs, args.workers):
+        print("❌ 回填结果不完整")
+        sys.exit(1)
+    print("✅ 回填结果完整")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地上游替身服务器
+回放中国福彩网 findDrawNotice 接口和中彩网开奖历史页面（数据由 fixtures 生成），
+可按数据源注入延迟、错误、超时、截断响应体和连接中断，用于测试重试、熔断和备用源回退
+
+用法:
+    python benchmarks/fake_upstream.py --port 8800 --latency lognormal:80,0.6 --cwl-error-rate 0.2
+    LOTTERY_UPSTREAM_BASE=http://127.0.0.1:8800 python real_server.py
+
+运行中可通过 /__faults 查看（GET）或修改（POST JSON，如 {"cwl": {"timeout_rate": 1}}）故障配置，
+/__stats 返回各数据源的请求结果计数
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from fixtures import cwl_json, select_draws, synthetic_draws, zhcw_html
+
+# 与 real_server.CWL_DRAW_NOTICE_PATH 一致
+CWL_DRAW_NOTICE_PATH = '/cwl_admin/front/cwlkj/search/kjxx/findDrawNotice'
+CWL_GAME_CODES = {'3d': 'fc3d', 'ssq': 'ssq'}
+ZHCW_PATHS = {
+    '/kjxx/3d/': 'fc3d',
+    '/kj/3d/': 'fc3d',
+    '/kjxx/ssq/': 'ssq',
+    '/kj/ssq/': 'ssq'
+}
+
+def parse_latency(spec):
+    """解析延迟分布（毫秒）：fixed:50 / uniform:20,200 / exp:100（均值）/ lognormal:80,0.6（中位数, sigma）"""
+    kind, _, args = spec.partition(':')
+    values = [float(x) for x in args.split(',')] if args else []
+    expected = {'fixed': 1, 'uniform': 2, 'exp': 1, 'lognormal': 2}
+    if kind not in expected or len(values) != expected[kind]:
+        raise ValueError(f'无效的延迟分布: {spec}')
+    return kind, values
+
+class FaultProfile:
+    """单个数据源的故障配置"""
+
+    FIELDS = ('latency', 'error_rate', 'error_status', 'timeout_rate', 'timeout_seconds',
+              'truncate_rate', 'reset_rate')
+
+    def __init__(self, latency='fixed:0', error_rate=0.0, error_status=503, timeout_rate=0.0,
+                 timeout_seconds=30.0, truncate_rate=0.0, reset_rate=0.0):
+        self.latency = latency
+        self._latency = parse_latency(latency)
+        # 返回错误状态码的比例
+        self.error_rate = error_rate
+        self.error_status = error_status
+        # 挂起 timeout_seconds 秒不响应的比例（应大于抓取端的读取超时）
+        self.timeout_rate = timeout_rate
+        self.timeout_seconds = timeout_seconds
+        # 返回 200 但响应体只有一半的比例
+        self.truncate_rate = truncate_rate
+        # 声明完整 Content-Length 后发送一半即断开连接的比例
+        self.reset_rate = reset_rate
+
+    def update(self, **changes):
+        for name, value in changes.items():
+            if name not in self.FIELDS:
+                raise ValueError(f'未知的故障配置: {name}')
+            if name == 'latency':
+                self._latency = parse_latency(value)
+            setattr(self, name, value)
+
+    def sample_latency(self, rng):
+        """按分布抽取一次延迟（秒）"""
+        kind, values = self._latency
+        if kind == 'fixed':
+            ms = values[0]
+        elif kind == 'uniform':
+            ms = rng.uniform(values[0], values[1])
+        elif kind == 'exp':
+            ms = rng.expovariate(1 / values[0]) if values[0] > 0 else 0
+        else:
+            ms = rng.lognormvariate(0, values[1]) * values[0]
+        return ms / 1000
+
+    def choose_fault(self, rng):
+        """按比例抽取本次请求的故障类型；None 表示正常响应"""
+        r = rng.random()
+        for fault, rate in (('timeout', self.timeout_rate), ('error', self.error_rate),
+                            ('reset', self.reset_rate), ('truncate', self.truncate_rate)):
+            if r < rate:
+                return fault
+            r -= rate
+        return None
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+class FakeUpstream:
+    """替身服务器状态：开奖数据、各数据源故障配置和请求计数"""
+
+    def __init__(self, count=3000, profiles=None, seed=None):
+        self.draws = {game: synthetic_draws(game, count) for game in ('fc3d', 'ssq')}
+        self.profiles = profiles or {'cwl': FaultProfile(), 'zhcw': FaultProfile()}
+        self.stats = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        # 中彩网页面在同一份数据下内容固定，生成一次后复用
+        self._pages = {}
+
+    def plan(self, source):
+        """为一次请求抽取 (延迟秒数, 故障类型)"""
+        with self._lock:
+            profile = self.profiles[source]
+            return profile.sample_latency(self._rng), profile.choose_fault(self._rng)
+
+    def count(self, source, outcome):
+        with self._lock:
+            key = f'{source}:{outcome}'
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def cwl_body(self, params):
+        game = CWL_GAME_CODES.get(params.get('name'))
+        if game is None:
+            return json.dumps({'state': 1, 'message': '参数错误', 'result': []}, ensure_ascii=False)
+        return cwl_json(select_draws(self.draws[game], params))
+
+    def zhcw_body(self, game):
+        with self._lock:
+            page = self._pages.get(game)
+        if page is None:
+            page = zhcw_html(game, self.draws[game])
+            with self._lock:
+                self._pages[game] = page
+        return page
+
+class UpstreamHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    upstream = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == '/__faults':
+            return self._send_json({name: p.to_dict() for name, p in self.upstream.profiles.items()})
+        if url.path == '/__stats':
+            return self._send_json(self.upstream.stats)
+
+        if url.path == CWL_DRAW_NOTICE_PATH:
+            source = 'cwl'
+            params = {k: v[0] for k, v in parse_qs(url.query, keep_blank_values=True).items()}
+            render = lambda: (self.upstream.cwl_body(params), 'application/json;charset=UTF-8')
+        elif url.path in ZHCW_PATHS:
+            source = 'zhcw'
+            game = ZHCW_PATHS[url.path]
+            render = lambda: (self.upstream.zhcw_body(game), 'text/html; charset=utf-8')
+        else:
+            return self._send(404, b'not found', 'text/plain')
+
+        latency, fault = self.upstream.plan(source)
+        self.upstream.count(source, fault or 'ok')
+        if fault == 'timeout':
+            time.sleep(self.upstream.profiles[source].timeout_seconds)
+            self.close_connection = True
+            return
+        time.sleep(latency)
+        if fault == 'error':
+            return self._send(self.upstream.profiles[source].error_status, b'Service Unavailable', 'text/plain')
+
+        text, content_type = render()
+        body = text.encode('utf-8')
+        if fault == 'truncate':
+            body = body[:len(body) // 2]
+        if fault == 'reset':
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body[:len(body) // 2])
+            self.close_connection = True
+            return
+        self._send(200, body, content_type)
+
+    def do_POST(self):
+        if urlsplit(self.path).path != '/__faults':
+            return self._send(404, b'not found', 'text/plain')
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            changes = json.loads(self.rfile.read(length) or b'{}')
+            for source, fields in changes.items():
+                self.upstream.profiles[source].update(**fields)
+        except (KeyError, ValueError) as e:
+            return self._send(400, str(e).encode('utf-8'), 'text/plain; charset=utf-8')
+        self.do_GET()
+
+    def _send_json(self, payload):
+        self._send(200, json.dumps(payload, ensure_ascii=False).encode('utf-8'), 'application/json')
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def start_fake_upstream(upstream, host='127.0.0.1', port=0):
+    """在后台线程启动替身服务器，返回 (server, 基础 URL)"""
+    handler = type('Handler', (UpstreamHandler,), {'upstream': upstream})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='fake-upstream', daemon=True).start()
+    return server, f'http://{host}:{server.server_port}'
+
+def profile_from_args(args, source):
+    """命令行参数中 --cwl-xxx / --zhcw-xxx 覆盖全局的 --xxx"""
+    values = {}
+    for name in FaultProfile.FIELDS:
+        value = getattr(args, f'{source}_{name}')
+        values[name] = value if value is not None else getattr(args, name)
+    return FaultProfile(**values)
+
+def main():
+    parser = argparse.ArgumentParser(description='本地上游替身服务器（中国福彩网 / 中彩网）')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--draws', type=int, default=3000, help='每个彩种生成的开奖期数')
+    parser.add_argument('--seed', type=int, help='故障抽样随机种子')
+    defaults = FaultProfile()
+    for prefix in ('', 'cwl-', 'zhcw-'):
+        scope = '（仅中国福彩网）' if prefix == 'cwl-' else '（仅中彩网）' if prefix == 'zhcw-' else ''
+        default = lambda name: None if prefix else getattr(defaults, name)
+        parser.add_argument(f'--{prefix}latency', default=default('latency'),
+                            help=f'延迟分布{scope}：fixed:50 / uniform:20,200 / exp:100 / lognormal:80,0.6')
+        parser.add_argument(f'--{prefix}error-rate', type=float, default=default('error_rate'), help=f'错误响应比例{scope}')
+        parser.add_argument(f'--{prefix}error-status', type=int, default=default('error_status'), help=f'错误状态码{scope}')
+        parser.add_argument(f'--{prefix}timeout-rate', type=float, default=default('timeout_rate'), help=f'挂起不响应比例{scope}')
+        parser.add_argument(f'--{prefix}timeout-seconds', type=float, default=default('timeout_seconds'), help=f'挂起秒数{scope}')
+        parser.add_argument(f'--{prefix}truncate-rate', type=float, default=default('truncate_rate'), help=f'截断响应体比例{scope}')
+        parser.add_argument(f'--{prefix}reset-rate', type=float, default=default('reset_rate'), help=f'发送中途断开连接比例{scope}')
+    args = parser.parse_args()
+
+    profiles = {source: profile_from_args(args, source) for source in ('cwl', 'zhcw')}
+    upstream = FakeUpstream(args.draws, profiles, args.seed)
+    handler = type('Handler', (UpstreamHandler,), {'upstream': upstream})
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    server.daemon_threads = True
+    print(f"🧪 上游替身服务器: http://{args.host}:{args.port}")
+    for source, profile in profiles.items():
+        print(f"   {source}: {profile.to_dict()}")
+    print(f"   使用: LOTTERY_UPSTREAM_BASE=http://{args.host}:{args.port} python real_server.py")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基准测试用上游数据
+按中国福彩网 findDrawNotice 接口和中彩网开奖历史页面的实际格式生成开奖数据，
+随机种子固定，同样的参数每次生成完全相同的内容
+"""
+
+import json
+import random
+from datetime import date, timedelta
+
+# 生成数据的最后一个开奖日（固定值，保证可复现）
+END_DATE = date(2025, 10, 18)
+
+# 开奖星期（Monday=0），与 real_server.DRAW_SCHEDULE 一致
+DRAW_WEEKDAYS = {
+    'fc3d': (0, 1, 2, 3, 4, 5, 6),
+    'ssq': (1, 3, 6)
+}
+
+GAME_NAMES = {'fc3d': '福彩3D', 'ssq': '双色球'}
+CWL_GAME_CODES = {'3d': 'fc3d', 'ssq': 'ssq'}
+WEEKDAY_NAMES = '一二三四五六日'
+
+def draw_dates(game, count, end=END_DATE):
+    """从 end 往前取 count 个开奖日，按时间从新到旧"""
+    dates = []
+    day = end
+    while len(dates) < count:
+        if day.weekday() in DRAW_WEEKDAYS[game]:
+            dates.append(day)
+        day -= timedelta(days=1)
+    return dates
+
+def synthetic_draws(game, count, seed=2025):
+    """生成 count 期开奖记录（cwl 接口 result 字段格式），按期号从新到旧"""
+    rng = random.Random(f'{game}-{seed}')
+    dates = draw_dates(game, count)
+
+    # 期号为 年份 + 当年序号，按开奖日从旧到新编号
+    periods = []
+    year, seq = None, 0
+    for day in reversed(dates):
+        if day.year != year:
+            year, seq = day.year, 0
+        seq += 1
+        periods.append(f'{year}{seq:03d}')
+    periods.reverse()
+
+    draws = []
+    for period, day in zip(periods, dates):
+        week = WEEKDAY_NAMES[day.weekday()]
+        item = {
+            'name': GAME_NAMES[game],
+            'code': period,
+            'detailsLink': f'/c/{day:%Y/%m/%d}/{period}.shtml',
+            'videoLink': '',
+            'date': f'{day:%Y-%m-%d}({week})',
+            'week': week,
+            'sales': str(rng.randint(40000000, 400000000)),
+            'poolmoney': str(rng.randint(0, 3000000000)),
+            'content': '',
+            'addmoney': '',
+            'msg': '',
+            'prizegrades': [
+                {'type': grade, 'typenum': str(rng.randint(0, 5000)), 'typemoney': str(rng.randint(5, 10000000))}
+                for grade in range(1, 7)
+            ]
+        }
+        if game == 'fc3d':
+            item['red'] = ' '.join(str(rng.randint(0, 9)) for _ in range(3))
+            item['blue'] = ''
+        else:
+            item['red'] = ','.join(f'{x:02d}' for x in sorted(rng.sample(range(1, 34), 6)))
+            item['blue'] = f'{rng.randint(1, 16):02d}'
+        draws.append(item)
+    return draws
+
+def select_draws(draws, params):
+    """按 findDrawNotice 的查询参数（issueStart/issueEnd/issueCount）筛选开奖记录"""
+    start = params.get('issueStart') or ''
+    end = params.get('issueEnd') or ''
+    if start or end:
+        return [d for d in draws if (not start or d['code'] >= start) and (not end or d['code'] <= end)]
+    count = params.get('issueCount') or ''
+    return draws[:int(count)] if count else draws
+
+def cwl_json(draws):
+    """findDrawNotice 接口响应体"""
+    return json.dumps({
+        'state': 0,
+        'message': '查询成功',
+        'total': len(draws),
+        'pageNum': 1,
+        'pageNo': 1,
+        'pageSize': len(draws),
+        'Tflag': 0,
+        'result': draws
+    }, ensure_ascii=False)
+
+def zhcw_html(game, draws):
+    """中彩网开奖历史页面"""
+    parts = [
+        '<!DOCTYPE html><html><head><meta charset="utf-8">',
+        f'<title>{GAME_NAMES[game]}开奖结果_中彩网</title></head><body>',
+        '<div class="header"><ul class="nav"><li><a href="/">首页</a></li></ul></div>',
+        '<div class="content"><table class="history-table">',
+        '<tr><th>期号</th><th>开奖日期</th><th>开奖号码</th>'
+        + ('' if game == 'fc3d' else '<th>蓝球</th>') + '<th>销售额(元)</th></tr>'
+    ]
+    for d in draws:
+        if game == 'fc3d':
+            balls = ''.join(f'<span class="ball">{x}</span>' for x in d['red'].split())
+            parts.append(
+                f'<tr><td>{d["code"]}</td><td>{d["date"][:10]}</td>'
+                f'<td>{balls}</td><td>{d["sales"]}</td></tr>'
+            )
+        else:
+            balls = ''.join(f'<span class="ball red">{x}</span>' for x in d['red'].split(','))
+            parts.append(
+                f'<tr><td>{d["code"]}</td><td>{d["date"][:10]}</td><td>{balls}</td>'
+                f'<td><span class="ball blue">{d["blue"]}</span></td><td>{d["sales"]}</td></tr>'
+            )
+    parts.append('</table></div><div class="footer">中彩网</div></body></html>')
+    return '\n'.join(parts)
+
+class FixtureResponse:
+    """与 requests.Response 接口一致的最小响应对象"""
+
+    def __init__(self, text, status_code=200):
+        self.text = text
+        self.status_code = status_code
+
+    def json(self):
+        return json.loads(self.text)
+
+class FixtureSession:
+    """代替 requests.Session：从内存中的数据回放 cwl 接口和中彩网页面"""
+
+    def __init__(self, count=3000):
+        self.headers = {}
+        self.draws = {game: synthetic_draws(game, count) for game in DRAW_WEEKDAYS}
+
+    def get(self, url, params=None, **kwargs):
+        if 'findDrawNotice' in url:
+            draws = self.draws[CWL_GAME_CODES[params['name']]]
+            return FixtureResponse(cwl_json(select_draws(draws, params)))
+        game = 'fc3d' if '/3d/' in url else 'ssq'
+        return FixtureResponse(zhcw_html(game, self.draws[game]))
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基准测试结果记录与对比
+每次运行追加一行 JSON 到 results.jsonl，并与同一套件的上一次结果对比
+"""
+
+import json
+import os
+import platform
+import subprocess
+from datetime import datetime
+
+RESULTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results.jsonl')
+
+def git_revision():
+    """当前代码版本（不在 git 仓库中时返回 None）"""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def load_previous(suite, path=RESULTS_FILE):
+    """读取同一套件最近一次的结果"""
+    if not os.path.exists(path):
+        return None
+    previous = None
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            run = json.loads(line)
+            if run.get('suite') == suite:
+                previous = run
+    return previous
+
+def save_run(suite, results, path=RESULTS_FILE):
+    run = {
+        'suite': suite,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git': git_revision(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results
+    }
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(run, ensure_ascii=False) + '\n')
+    return run
+
+def higher_is_better(key):
+    """吞吐量类指标越大越好，其余（耗时）越小越好"""
+    return key.endswith('_rps')
+
+def compare(previous, results, threshold):
+    """返回 [(指标, 上次, 本次, 变化比例, 是否退化)]"""
+    rows = []
+    old_results = previous['results'] if previous else {}
+    for key, value in results.items():
+        old = old_results.get(key)
+        if not old:
+            rows.append((key, None, value, None, False))
+            continue
+        change = (value - old) / old
+        worse = -change if higher_is_better(key) else change
+        rows.append((key, old, value, change, worse > threshold))
+    return rows
+
+def report(suite, results, threshold=0.1, save=True, path=RESULTS_FILE):
+    """打印本次结果及与上次的对比，保存结果；返回退化的指标数"""
+    previous = load_previous(suite, path)
+    rows = compare(previous, results, threshold)
+
+    if previous:
+        print(f"\n📊 {suite}: 对比 {previous['timestamp']} ({previous.get('git') or '-'})")
+    else:
+        print(f"\n📊 {suite}: 没有历史结果")
+    width = max(len(key) for key, *_ in rows) if rows else 0
+    regressions = 0
+    for key, old, value, change, regressed in rows:
+        line = f"  {key:<{width}}  {value:>12.3f}"
+        if change is not None:
+            line += f"  {old:>12.3f}  {change:+7.1%}"
+        if regressed:
+            line += "  ⚠️ 退化"
+            regressions += 1
+        print(line)
+
+    if save:
+        save_run(suite, results, path)
+        print(f"💾 结果已追加到 {path}")
+    return regressions
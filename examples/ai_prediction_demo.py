@@ -5,6 +5,7 @@
 注意：此模型仅用于学习和研究，不保证预测准确性
 """
 
+import os
 import numpy as np
 import pandas as pd
 from sklearn.ensemble import RandomForestRegressor
@@ -13,6 +14,14 @@ from sklearn.preprocessing import StandardScaler
 import warnings
 warnings.filterwarnings('ignore')
 
+try:
+    import pyarrow as pa
+except ImportError:  # 未安装 pyarrow 时使用随机生成的数据
+    pa = None
+
+# 服务器生成的 Arrow 历史文件目录（与 real_server.py 的 LOTTERY_SNAPSHOT_DIR 一致）
+HISTORY_DIR = os.environ.get('LOTTERY_SNAPSHOT_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
 class LotteryAIPredictor:
     def __init__(self):
         self.models = {}
@@ -38,6 +47,35 @@ class LotteryAIPredictor:
         
         return pd.DataFrame(data, columns=self.feature_names)
     
+    def load_history_data(self, path=os.path.join(HISTORY_DIR, 'fc3d.arrow')):
+        """从 Arrow 历史文件（mmap）加载真实开奖数据；文件不存在或未安装 pyarrow 时返回 None"""
+        if pa is None or not os.path.exists(path):
+            return None
+        
+        with pa.memory_map(path, 'r') as source:
+            table = pa.ipc.open_file(source).read_all()
+        
+        digits = np.column_stack([table.column(name).to_numpy() for name in ('d0', 'd1', 'd2')]).astype(int)
+        dates = pd.DatetimeIndex(table.column('date').to_numpy().astype('datetime64[ns]'))
+        consecutive = (np.abs(digits[:, 0] - digits[:, 1]) == 1) | (np.abs(digits[:, 1] - digits[:, 2]) == 1)
+        
+        return pd.DataFrame({
+            'period': np.arange(len(table)),
+            'day_of_week': dates.dayofweek,
+            'month': dates.month,
+            'hundreds': digits[:, 0],
+            'tens': digits[:, 1],
+            'ones': digits[:, 2],
+            # 统计列由服务器预先计算
+            'sum_value': table.column('sum').to_numpy(),
+            'span_value': table.column('span').to_numpy(),
+            'odd_count': table.column('oddCount').to_numpy(),
+            'even_count': table.column('evenCount').to_numpy(),
+            'big_count': table.column('bigCount').to_numpy(),
+            'small_count': table.column('smallCount').to_numpy(),
+            'consecutive_count': consecutive
+        }, columns=self.feature_names).astype(int)
+    
     def calculate_features(self, period, digits):
         """计算特征值"""
         hundreds, tens, ones = digits
@@ -129,9 +167,12 @@ def main():
     # 创建预测器
     predictor = LotteryAIPredictor()
     
-    # 生成训练数据
-    print("📊 生成训练数据...")
-    training_data = predictor.generate_training_data(1000)
+    # 加载训练数据
+    print("📊 加载训练数据...")
+    training_data = predictor.load_history_data()
+    if training_data is None:
+        print("未找到开奖历史文件（fc3d.arrow），使用随机生成的数据")
+        training_data = predictor.generate_training_data(1000)
     print(f"训练数据形状: {training_data.shape}")
     
     # 训练模型
@@ -5,6 +5,7 @@
 注意：此模型仅用于学习和研究，不保证预测准确性
 """
 
+import os
 import numpy as np
 import pandas as pd
 import tensorflow as tf
@@ -15,6 +16,14 @@ from sklearn.preprocessing import MinMaxScaler
 import warnings
 warnings.filterwarnings('ignore')
 
+try:
+    import pyarrow as pa
+except ImportError:  # 未安装 pyarrow 时使用随机生成的数据
+    pa = None
+
+# 服务器生成的 Arrow 历史文件目录（与 real_server.py 的 LOTTERY_SNAPSHOT_DIR 一致）
+HISTORY_DIR = os.environ.get('LOTTERY_SNAPSHOT_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
 class LotteryLSTMPredictor:
     def __init__(self, sequence_length=10):
         self.sequence_length = sequence_length
@@ -49,6 +58,19 @@ class LotteryLSTMPredictor:
         
         return np.array(data)
     
+    def load_sequence_data(self, path=os.path.join(HISTORY_DIR, 'fc3d.arrow')):
+        """从 Arrow 历史文件（mmap）加载真实开奖序列，特征与 generate_sequence_data 相同；
+        文件不存在或未安装 pyarrow 时返回 None"""
+        if pa is None or not os.path.exists(path):
+            return None
+        
+        with pa.memory_map(path, 'r') as source:
+            table = pa.ipc.open_file(source).read_all()
+        
+        dates = pd.DatetimeIndex(table.column('date').to_numpy().astype('datetime64[ns]'))
+        columns = [table.column(name).to_numpy() for name in ('d0', 'd1', 'd2', 'sum', 'span', 'oddCount', 'bigCount')]
+        return np.column_stack(columns + [dates.dayofweek, dates.month]).astype(int)
+    
     def create_sequences(self, data):
         """创建时间序列数据"""
         X, y = [], []
@@ -151,9 +173,15 @@ def main():
     # 创建LSTM预测器
     lstm_predictor = LotteryLSTMPredictor(sequence_length=10)
     
-    # 生成数据
-    print("📊 生成训练数据...")
-    data = lstm_predictor.generate_sequence_data(1000)
+    # 加载数据：真实开奖历史的最后 200 期留作评估
+    print("📊 加载训练数据...")
+    data = lstm_predictor.load_sequence_data()
+    if data is not None and len(data) > 400:
+        data, test_data = data[:-200], data[-200:]
+    else:
+        print("未找到开奖历史文件（fc3d.arrow），使用随机生成的数据")
+        data = lstm_predictor.generate_sequence_data(1000)
+        test_data = lstm_predictor.generate_sequence_data(200)
     print(f"数据形状: {data.shape}")
     
     # 训练模型
@@ -170,7 +198,6 @@ def main():
     
     # 评估模型
     print("\n📈 模型评估...")
-    test_data = lstm_predictor.generate_sequence_data(200)
     accuracy, predictions, actual = lstm_predictor.evaluate_model(test_data)
     print(f"模型准确率: {accuracy:.4f} ({accuracy*100:.2f}%)")
     
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""
+gunicorn 生产配置
+启动：gunicorn -c gunicorn.conf.py real_server:app
+
+默认使用 gevent worker：每个连接是一个协程，/api/stream 的大量空闲长连接几乎不占资源。
+同一主机上的多个 worker 通过 SQLite 本地存储共享开奖数据，只有持有文件锁的一个 worker
+抓取上游，其余 worker 只读本地存储，因此增加 worker 不会增加上游请求。
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+
+# gevent（默认）或 gthread
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gevent')
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
+
+# 不预加载应用：每个 worker 在 fork 之后（gevent 打补丁之后）各自导入并打开 SQLite 连接
+preload_app = False
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_worker_init(worker):
+    """worker 开始接受请求前启动后台任务：先从本地快照预热缓存，不必等第一个请求抓取上游"""
+    from real_server import start_background
+    start_background()
@@ -5,15 +5,58 @@
 从官方数据源获取真实的福彩3D和双色球开奖数据
 """
 
-from flask import Flask, jsonify, request, make_response
+from flask import Flask, jsonify, request, make_response, Response, stream_with_context, g
 from flask_cors import CORS
 import requests
-from bs4 import BeautifulSoup
+import gzip
+import contextvars
+import csv
+import hashlib
+import importlib.util
+import io
 import json
 import re
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import time
 import logging
+import mmap
+import os
+import random
+import functools
+import sqlite3
+import struct
+import tempfile
+import threading
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from html.parser import HTMLParser
+
+try:
+    import fcntl
+except ImportError:  # 非 Unix 平台不做跨进程协调，每个进程各自抓取
+    fcntl = None
+
+try:
+    import numpy as np
+except ImportError:  # 未安装 NumPy 时统计列逐行计算
+    np = None
+
+try:
+    import orjson
+except ImportError:  # 未安装 orjson 时使用标准库 json
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # 未安装 brotli 时只提供 gzip
+    brotli = None
+
+# pyarrow 导入较慢，只在读写 Arrow 历史文件时按需导入；未安装时不生成 Arrow 历史文件
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
@@ -41,8 +84,1105 @@ def api_cors_preflight(subpath):
     resp.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
     return resp
 
-class RealLotteryDataScraper:
+# 本地开奖数据库路径
+DB_PATH = os.environ.get(
+    'LOTTERY_DB_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lottery_draws.db')
+)
+
+# 开奖时间（北京时间）：福彩3D每天21:15，双色球每周二、四、日21:15
+BEIJING_TZ = timezone(timedelta(hours=8))
+DRAW_SCHEDULE = {
+    'fc3d': {'weekdays': (0, 1, 2, 3, 4, 5, 6), 'hour': 21, 'minute': 15},
+    'ssq': {'weekdays': (1, 3, 6), 'hour': 21, 'minute': 15}
+}
+
+# 开奖数据快照目录（固定布局的二进制列文件，供多进程 mmap 只读共享）
+SNAPSHOT_DIR = os.environ.get('LOTTERY_SNAPSHOT_DIR', os.path.dirname(DB_PATH))
+
+# 上游数据源地址；RealLotteryDataScraper 可改指向本地替身服务器（benchmarks/fake_upstream.py）
+CWL_BASE_URL = "https://www.cwl.gov.cn"
+ZHCW_BASE_URL = "https://www.zhcw.com"
+CWL_DRAW_NOTICE_PATH = "/cwl_admin/front/cwlkj/search/kjxx/findDrawNotice"
+
+def date_to_ordinal(date):
+    """'YYYY-MM-DD' 开头的日期字符串转为日序数"""
+    return datetime.strptime(date[:10], '%Y-%m-%d').toordinal()
+
+def ordinal_to_date(ordinal):
+    """日序数转为 'YYYY-MM-DD'"""
+    return datetime.fromordinal(ordinal).strftime('%Y-%m-%d')
+
+def _column_matrix(columns, names):
+    """把若干 uint8 列组合成 n×k 矩阵（零拷贝读取列缓冲区）"""
+    return np.stack([np.frombuffer(columns[name], dtype=np.uint8) for name in names], axis=1)
+
+def derive_fc3d_stats(columns):
+    """批量计算福彩3D每期的和值、跨度、奇偶、大小个数"""
+    names = ('d0', 'd1', 'd2')
+    if np is not None and len(columns['period']):
+        m = _column_matrix(columns, names)
+        odd = (m & 1).sum(axis=1)
+        big = (m >= 5).sum(axis=1)
+        return {
+            'sum': m.sum(axis=1).tolist(),
+            'span': (m.max(axis=1) - m.min(axis=1)).tolist(),
+            'oddCount': odd.tolist(),
+            'evenCount': (3 - odd).tolist(),
+            'bigCount': big.tolist(),
+            'smallCount': (3 - big).tolist()
+        }
+    
+    stats = {key: [] for key in ('sum', 'span', 'oddCount', 'evenCount', 'bigCount', 'smallCount')}
+    for digits in zip(*(columns[name] for name in names)):
+        odd = sum(d & 1 for d in digits)
+        big = sum(d >= 5 for d in digits)
+        stats['sum'].append(sum(digits))
+        stats['span'].append(max(digits) - min(digits))
+        stats['oddCount'].append(odd)
+        stats['evenCount'].append(3 - odd)
+        stats['bigCount'].append(big)
+        stats['smallCount'].append(3 - big)
+    return stats
+
+def derive_ssq_stats(columns):
+    """批量计算双色球每期红球的和值、奇偶、大小个数"""
+    names = SSQTable.RED_COLUMNS
+    if np is not None and len(columns['period']):
+        m = _column_matrix(columns, names)
+        odd = (m & 1).sum(axis=1)
+        big = (m > 16).sum(axis=1)
+        return {
+            'redSum': m.sum(axis=1, dtype=np.int32).tolist(),
+            'redOddCount': odd.tolist(),
+            'redEvenCount': (6 - odd).tolist(),
+            'redBigCount': big.tolist(),
+            'redSmallCount': (6 - big).tolist()
+        }
+    
+    stats = {key: [] for key in ('redSum', 'redOddCount', 'redEvenCount', 'redBigCount', 'redSmallCount')}
+    for reds in zip(*(columns[name] for name in names)):
+        odd = sum(n & 1 for n in reds)
+        big = sum(n > 16 for n in reds)
+        stats['redSum'].append(sum(reds))
+        stats['redOddCount'].append(odd)
+        stats['redEvenCount'].append(6 - odd)
+        stats['redBigCount'].append(big)
+        stats['redSmallCount'].append(6 - big)
+    return stats
+
+class DrawTable:
+    """列式开奖数据：每列为一个紧凑数组（array 或 memoryview），按期号升序排列。
+    解析器只产出原始列，统计列在 stats() 中整批计算，只在接口输出时才转换为原有的 JSON 结构"""
+
+    # 列名 -> array 类型码，顺序与 make_row 返回的元组一致
+    COLUMNS = {}
+
+    def __init__(self, columns=None):
+        self.columns = columns or {name: array(code) for name, code in self.COLUMNS.items()}
+        self._stats = None
+
+    def __len__(self):
+        return len(self.columns['period'])
+
+    @classmethod
+    def from_rows(cls, rows):
+        """由 make_row 产出的元组构造（按期号排序）"""
+        rows = sorted(rows)
+        return cls({
+            name: array(code, (row[i] for row in rows))
+            for i, (name, code) in enumerate(cls.COLUMNS.items())
+        })
+
+    def rows(self):
+        """按期号升序逐行返回元组"""
+        return zip(*self.columns.values())
+
+    def slice(self, start, stop):
+        """按下标切片（升序），已计算的统计列一并切片"""
+        table = type(self)({name: col[start:stop] for name, col in self.columns.items()})
+        if self._stats is not None:
+            table._stats = {key: col[start:stop] for key, col in self._stats.items()}
+        return table
+
+    def latest(self, limit=None):
+        """最近 limit 期"""
+        n = len(self)
+        if limit is None or limit >= n:
+            return self
+        return self.slice(max(n - limit, 0), n)
+
+    def after(self, period):
+        """期号大于 period 的部分"""
+        return self.slice(bisect_right(self.columns['period'], int(period)), len(self))
+
+    def between(self, column, low=None, high=None):
+        """按升序列 column（period 或 day）二分查找 [low, high] 闭区间"""
+        col = self.columns[column]
+        start = bisect_left(col, low) if low is not None else 0
+        stop = bisect_right(col, high) if high is not None else len(self)
+        return self.slice(start, max(start, stop))
+
+    def page(self, page, page_size):
+        """按期号倒序分页，第 1 页为最新的 page_size 期"""
+        stop = max(len(self) - (page - 1) * page_size, 0)
+        return self.slice(max(stop - page_size, 0), stop)
+
+    def latest_period(self):
+        return str(self.columns['period'][-1]) if len(self) else None
+
+    def latest_date(self):
+        return ordinal_to_date(self.columns['day'][-1]) if len(self) else None
+
+    def version(self):
+        """数据版本：最新期号和总期数，新一期入库后改变"""
+        return f"{self.latest_period()}-{len(self)}"
+
+    def nbytes(self):
+        """各列占用的字节数"""
+        return sum(len(col) * col.itemsize for col in self.columns.values())
+
+    def stats(self):
+        """整批计算并缓存统计列"""
+        if self._stats is None:
+            self._stats = self.derive_stats(self.columns)
+        return self._stats
+
+    def to_records(self):
+        """转换为按期号倒序的记录列表（原接口格式）"""
+        stats = self.stats()
+        return [self.record(i, stats) for i in range(len(self) - 1, -1, -1)]
+
+class FC3DTable(DrawTable):
+    """福彩3D列式数据：期号 int32、日期序数 int32、三位数字各一列 uint8"""
+
+    COLUMNS = {'period': 'i', 'day': 'i', 'd0': 'B', 'd1': 'B', 'd2': 'B'}
+    derive_stats = staticmethod(derive_fc3d_stats)
+
+    @staticmethod
+    def make_row(period, date, number):
+        return (int(period), date_to_ordinal(date), int(number[0]), int(number[1]), int(number[2]))
+
+    def record(self, i, stats):
+        c = self.columns
+        return {
+            'period': str(c['period'][i]),
+            'date': ordinal_to_date(c['day'][i]),
+            'number': f"{c['d0'][i]}{c['d1'][i]}{c['d2'][i]}",
+            **{key: col[i] for key, col in stats.items()}
+        }
+
+class SSQTable(DrawTable):
+    """双色球列式数据：期号 int32、日期序数 int32、六个红球和蓝球各一列 uint8"""
+
+    COLUMNS = {
+        'period': 'i', 'day': 'i',
+        'r0': 'B', 'r1': 'B', 'r2': 'B', 'r3': 'B', 'r4': 'B', 'r5': 'B',
+        'blue': 'B'
+    }
+    RED_COLUMNS = ('r0', 'r1', 'r2', 'r3', 'r4', 'r5')
+    derive_stats = staticmethod(derive_ssq_stats)
+
+    @staticmethod
+    def make_row(period, date, redBalls, blueBall):
+        return (int(period), date_to_ordinal(date), *redBalls, blueBall)
+
+    def record(self, i, stats):
+        c = self.columns
+        return {
+            'period': str(c['period'][i]),
+            'date': ordinal_to_date(c['day'][i]),
+            'redBalls': [c[name][i] for name in self.RED_COLUMNS],
+            'blueBall': c['blue'][i],
+            **{key: col[i] for key, col in stats.items()}
+        }
+
+DRAW_TABLES = {'fc3d': FC3DTable, 'ssq': SSQTable}
+
+def _frequency(columns, names, size):
+    """统计若干号码列中 0..size 每个号码出现的次数"""
+    if np is not None:
+        values = np.concatenate([np.frombuffer(columns[name], dtype=np.uint8) for name in names])
+        return np.bincount(values, minlength=size + 1).tolist()
+    counts = [0] * (size + 1)
+    for name in names:
+        for value in columns[name]:
+            counts[value] += 1
+    return counts
+
+def _hot_cold(counts, numbers, top):
+    """按出现次数从高到低排序（次数相同按号码升序），取前 top 个为热号、后 top 个为冷号"""
+    ranked = sorted(numbers, key=lambda n: -counts[n])
+    return ranked[:top], ranked[-top:]
+
+def analyze_fc3d(table, window):
+    """福彩3D最近 window 期的分析：各位数字频率和冷热号、和值范围、奇偶大小比例"""
+    recent = table.latest(window)
+    stats = recent.stats()
+    positions = []
+    for name in ('d0', 'd1', 'd2'):
+        counts = _frequency(recent.columns, (name,), 9)
+        hot, cold = _hot_cold(counts, range(10), 3)
+        positions.append({'frequency': counts, 'hot': hot, 'cold': cold})
+    digits = 3 * len(recent)
+    return {
+        'count': len(recent),
+        'positions': positions,
+        'frequency': _frequency(recent.columns, ('d0', 'd1', 'd2'), 9),
+        'sumRange': [min(stats['sum']), max(stats['sum'])],
+        'oddRatio': round(sum(stats['oddCount']) / digits, 3),
+        'bigRatio': round(sum(stats['bigCount']) / digits, 3)
+    }
+
+def analyze_ssq(table, window):
+    """双色球最近 window 期的分析：红球 1–33、蓝球 1–16 频率和冷热号、和值范围、奇偶大小比例"""
+    recent = table.latest(window)
+    stats = recent.stats()
+    red_counts = _frequency(recent.columns, SSQTable.RED_COLUMNS, 33)
+    blue_counts = _frequency(recent.columns, ('blue',), 16)
+    red_hot, red_cold = _hot_cold(red_counts, range(1, 34), 10)
+    blue_hot, blue_cold = _hot_cold(blue_counts, range(1, 17), 3)
+    balls = 6 * len(recent)
+    return {
+        'count': len(recent),
+        # 频率列表下标即号码，下标 0 恒为 0
+        'redFrequency': red_counts,
+        'blueFrequency': blue_counts,
+        'redHot': red_hot,
+        'redCold': red_cold,
+        'blueHot': blue_hot,
+        'blueCold': blue_cold,
+        'redSumRange': [min(stats['redSum']), max(stats['redSum'])],
+        'redOddRatio': round(sum(stats['redOddCount']) / balls, 3),
+        'redBigRatio': round(sum(stats['redBigCount']) / balls, 3)
+    }
+
+ANALYZERS = {'fc3d': analyze_fc3d, 'ssq': analyze_ssq}
+
+class OmissionIndex:
+    """号码遗漏索引：记录每个号码最近一次出现的期序号和历史最大遗漏。
+    追加一期只更新该期开出的号码，查询与历史长度无关"""
+
+    # 彩种 -> {分组: (号码列, 号码范围)}
+    GROUPS = {
+        'fc3d': {
+            'd0': (('d0',), range(10)),
+            'd1': (('d1',), range(10)),
+            'd2': (('d2',), range(10))
+        },
+        'ssq': {
+            'red': (SSQTable.RED_COLUMNS, range(1, 34)),
+            'blue': (('blue',), range(1, 17))
+        }
+    }
+
+    def __init__(self, game):
+        self.game = game
+        self.groups = self.GROUPS[game]
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.count = 0
+        self.period = None
+        # 下标即号码；-1 表示从未开出
+        self.last_seen = {g: [-1] * (numbers[-1] + 1) for g, (_, numbers) in self.groups.items()}
+        self.max_gap = {g: [0] * (numbers[-1] + 1) for g, (_, numbers) in self.groups.items()}
+
+    def update(self, table):
+        """把 table 中新增的期数追加到索引；历史数据有变化（如补录旧期）时重建"""
+        with self._lock:
+            if self.period is not None and table.latest_period() == self.period and len(table) == self.count:
+                return
+            if self.period is None or len(table) - len(table.after(self.period)) != self.count:
+                self._reset()
+                new = table
+            else:
+                new = table.after(self.period)
+            columns = {name: new.columns[name] for cols, _ in self.groups.values() for name in cols}
+            for i in range(len(new)):
+                self._append({name: col[i] for name, col in columns.items()})
+            self.period = table.latest_period()
+
+    def _append(self, draw):
+        """追加一期开奖，draw 为 {号码列: 号码}"""
+        index = self.count
+        for group, (cols, _) in self.groups.items():
+            last_seen = self.last_seen[group]
+            max_gap = self.max_gap[group]
+            for name in cols:
+                number = draw[name]
+                gap = index - last_seen[number] - 1
+                if gap > max_gap[number]:
+                    max_gap[number] = gap
+                last_seen[number] = index
+        self.count += 1
+
+    def snapshot(self):
+        """各分组每个号码的当前遗漏和历史最大遗漏（列表下标即号码）"""
+        with self._lock:
+            result = {}
+            for group, (_, numbers) in self.groups.items():
+                current = [0] * (numbers[-1] + 1)
+                maximum = [0] * (numbers[-1] + 1)
+                for n in numbers:
+                    current[n] = self.count - 1 - self.last_seen[group][n]
+                    maximum[n] = max(self.max_gap[group][n], current[n])
+                result[group] = {'current': current, 'max': maximum}
+            return result
+
+# 快照文件布局（小端）：
+#   文件头   magic(8) 彩种(4) 行数 uint32 列数 uint32
+#   列目录   每列 名称(16) 类型码(1) 种类(1: 0 原始列 / 1 统计列) 填充(2) 数据偏移 uint64
+#   列数据   每列 行数 × 元素大小 字节，按 8 字节对齐
+SNAPSHOT_MAGIC = b'LTSNAP01'
+SNAPSHOT_HEADER = struct.Struct('<8s4sII')
+SNAPSHOT_COLUMN = struct.Struct('<16sccxxQ')
+
+def snapshot_path(game):
+    """彩种快照文件路径"""
+    return os.path.join(SNAPSHOT_DIR, f'{game}.snapshot')
+
+@contextmanager
+def replacing_file(path):
+    """在 path 同目录创建唯一的临时文件供写入，完成后原子替换 path，出错时删除临时文件；
+    同一进程的多个线程同时写同一个文件也各用各的临时文件"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+    os.close(fd)
+    try:
+        # mkstemp 创建的文件只有属主可读，与直接创建的文件保持一致
+        os.chmod(tmp_path, 0o644)
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+def write_snapshot(path, game, table):
+    """把开奖数据和统计列写入快照文件：先写临时文件再原子替换，读取方不会看到半个文件"""
+    columns = [(name, code, 0, table.columns[name]) for name, code in table.COLUMNS.items()]
+    # 统计列取值都在 0–255 之间（红球和值最大 183）
+    columns += [(name, 'B', 1, values) for name, values in table.stats().items()]
+
+    rows = len(table)
+    offset = SNAPSHOT_HEADER.size + SNAPSHOT_COLUMN.size * len(columns)
+    directory = []
+    blobs = []
+    for name, code, kind, values in columns:
+        offset += -offset % 8
+        blob = array(code, values).tobytes()
+        directory.append(SNAPSHOT_COLUMN.pack(name.encode('ascii'), code.encode('ascii'), bytes([kind]), offset))
+        blobs.append((offset, blob))
+        offset += len(blob)
+
+    with replacing_file(path) as tmp_path, open(tmp_path, 'wb') as f:
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, game.encode('ascii'), rows, len(columns)))
+        f.write(b''.join(directory))
+        for blob_offset, blob in blobs:
+            f.write(b'\0' * (blob_offset - f.tell()))
+            f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+
+def load_snapshot(path):
+    """以只读 mmap 打开快照文件，返回列直接指向映射内存的 DrawTable（零拷贝）"""
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, game, rows, count = SNAPSHOT_HEADER.unpack_from(mapped, 0)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError(f'{path} 不是开奖数据快照文件')
+
+    buffer = memoryview(mapped)
+    columns = {}
+    stats = {}
+    for i in range(count):
+        name, code, kind, offset = SNAPSHOT_COLUMN.unpack_from(mapped, SNAPSHOT_HEADER.size + i * SNAPSHOT_COLUMN.size)
+        code = code.decode('ascii')
+        size = rows * array(code).itemsize
+        view = buffer[offset:offset + size].cast(code)
+        target = stats if kind == b'\x01' else columns
+        target[name.rstrip(b'\0').decode('ascii')] = view
+
+    table = DRAW_TABLES[game.rstrip(b'\0').decode('ascii')](columns)
+    table._stats = stats
+    return table
+
+# Arrow 历史文件中的日期列为 date32（1970-01-01 起的天数）
+EPOCH_ORDINAL = datetime(1970, 1, 1).toordinal()
+
+def history_path(game):
+    """彩种 Arrow 历史文件路径"""
+    return os.path.join(SNAPSHOT_DIR, f'{game}.arrow')
+
+def write_history_arrow(path, game, table):
+    """把开奖数据和统计列写成 Arrow IPC 文件（不压缩，读取方可 mmap 零拷贝加载到 NumPy / pandas）；
+    先写临时文件再原子替换"""
+    import pyarrow as pa
+    
+    arrow_types = {'i': pa.int32(), 'B': pa.uint8()}
+    names = ['period', 'date']
+    arrays = [
+        pa.array(table.columns['period'], type=pa.int32()),
+        pa.array([day - EPOCH_ORDINAL for day in table.columns['day']], type=pa.int32()).cast(pa.date32())
+    ]
+    for name, code in table.COLUMNS.items():
+        if name not in ('period', 'day'):
+            names.append(name)
+            arrays.append(pa.array(table.columns[name], type=arrow_types[code]))
+    for name, values in table.stats().items():
+        names.append(name)
+        arrays.append(pa.array(values, type=pa.uint8()))
+    
+    arrow_table = pa.Table.from_arrays(arrays, names=names).replace_schema_metadata({
+        'game': game,
+        'version': table.version()
+    })
+    with replacing_file(path) as tmp_path:
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, arrow_table.schema) as writer:
+                writer.write_table(arrow_table)
+
+def read_history_arrow(path):
+    """以 mmap 方式打开 Arrow 历史文件，返回 pyarrow.Table（列数据直接引用映射内存）"""
+    import pyarrow as pa
+    
+    with pa.memory_map(path, 'r') as source:
+        return pa.ipc.open_file(source).read_all()
+
+def last_draw_time(game, now=None):
+    """返回 now 之前（含）最近一次开奖时间"""
+    schedule = DRAW_SCHEDULE[game]
+    now = now or datetime.now(BEIJING_TZ)
+    candidate = now.replace(hour=schedule['hour'], minute=schedule['minute'], second=0, microsecond=0)
+    if candidate > now:
+        candidate -= timedelta(days=1)
+    while candidate.weekday() not in schedule['weekdays']:
+        candidate -= timedelta(days=1)
+    return candidate
+
+def has_latest_draw(game, table, now=None):
+    """判断开奖数据是否已包含最近一次开奖"""
+    if not table:
+        return False
+    return table.latest_date() >= last_draw_time(game, now).strftime('%Y-%m-%d')
+
+def next_draw_time(game, now=None):
+    """返回 now 之后最近一次开奖时间"""
+    schedule = DRAW_SCHEDULE[game]
+    now = now or datetime.now(BEIJING_TZ)
+    candidate = now.replace(hour=schedule['hour'], minute=schedule['minute'], second=0, microsecond=0)
+    if candidate <= now:
+        candidate += timedelta(days=1)
+    while candidate.weekday() not in schedule['weekdays']:
+        candidate += timedelta(days=1)
+    return candidate
+
+class DrawStore:
+    """本地开奖数据存储（SQLite），以期号为主键保存全部历史开奖"""
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS fc3d_draws ('
+                'period TEXT PRIMARY KEY, date TEXT NOT NULL, number TEXT NOT NULL)'
+            )
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS ssq_draws ('
+                'period TEXT PRIMARY KEY, date TEXT NOT NULL, '
+                'red TEXT NOT NULL, blue INTEGER NOT NULL)'
+            )
+            # 历史回填已完成的期号区间
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS backfill_checkpoints ('
+                'game TEXT NOT NULL, issue_start TEXT NOT NULL, issue_end TEXT NOT NULL, '
+                'rows INTEGER NOT NULL, finished_at TEXT NOT NULL, '
+                'PRIMARY KEY (game, issue_start))'
+            )
+            self._conn.commit()
+
+    def latest_period(self, game):
+        """返回本地已保存的最新期号，无数据时返回 None"""
+        with self._lock:
+            row = self._conn.execute(f'SELECT MAX(period) FROM {game}_draws').fetchone()
+        return row[0] if row else None
+
+    def version(self, game):
+        """数据版本（最新期号和总期数），与 DrawTable.version() 一致"""
+        with self._lock:
+            latest, count = self._conn.execute(
+                f'SELECT MAX(period), COUNT(*) FROM {game}_draws'
+            ).fetchone()
+        return f"{latest}-{count}"
+
+    def count(self, game):
+        """返回本地已保存的期数"""
+        with self._lock:
+            return self._conn.execute(f'SELECT COUNT(*) FROM {game}_draws').fetchone()[0]
+
+    def upsert(self, game, table, checkpoints=()):
+        """写入开奖数据（DrawTable，已存在的期号会被覆盖），返回新增期数；
+        checkpoints 为 [(起始期号, 结束期号, 期数)]，与数据在同一事务中记为已回填"""
+        if game == 'fc3d':
+            rows = [
+                (str(period), ordinal_to_date(day), f'{d0}{d1}{d2}')
+                for period, day, d0, d1, d2 in table.rows()
+            ]
+            sql = 'INSERT OR REPLACE INTO fc3d_draws (period, date, number) VALUES (?, ?, ?)'
+        else:
+            rows = [
+                (str(period), ordinal_to_date(day), ','.join(f'{n:02d}' for n in reds), blue)
+                for period, day, *reds, blue in table.rows()
+            ]
+            sql = 'INSERT OR REPLACE INTO ssq_draws (period, date, red, blue) VALUES (?, ?, ?, ?)'
+        with self._lock:
+            before = self._conn.execute(f'SELECT COUNT(*) FROM {game}_draws').fetchone()[0]
+            self._conn.executemany(sql, rows)
+            if checkpoints:
+                finished_at = datetime.now().isoformat(timespec='seconds')
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO backfill_checkpoints '
+                    '(game, issue_start, issue_end, rows, finished_at) VALUES (?, ?, ?, ?, ?)',
+                    [(game, start, end, count, finished_at) for start, end, count in checkpoints]
+                )
+            self._conn.commit()
+            after = self._conn.execute(f'SELECT COUNT(*) FROM {game}_draws').fetchone()[0]
+        return after - before
+
+    def iter_chunks(self, game, chunk_size=1000):
+        """按期号升序分批读取全部原始开奖记录；使用独立连接，导出大量数据时不阻塞其他读写"""
+        columns = 'period, date, number' if game == 'fc3d' else 'period, date, red, blue'
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        try:
+            cursor = conn.execute(f'SELECT {columns} FROM {game}_draws ORDER BY period')
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            conn.close()
+
+    def checkpoints(self, game):
+        """已回填完成的区间起始期号（0 期的检查点视为未完成）"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT issue_start FROM backfill_checkpoints WHERE game = ? AND rows > 0', (game,)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def clear_checkpoints(self, game):
+        with self._lock:
+            self._conn.execute('DELETE FROM backfill_checkpoints WHERE game = ?', (game,))
+            self._conn.commit()
+
+    def load(self, game, limit=None):
+        """读取最近 limit 期开奖记录（limit 为 None 时读取全部），返回按期号升序的 DrawTable"""
+        if limit is None:
+            limit = -1
+        with self._lock:
+            if game == 'fc3d':
+                rows = self._conn.execute(
+                    'SELECT period, date, number FROM '
+                    '(SELECT * FROM fc3d_draws ORDER BY period DESC LIMIT ?) ORDER BY period',
+                    (limit,)
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    'SELECT period, date, red, blue FROM '
+                    '(SELECT * FROM ssq_draws ORDER BY period DESC LIMIT ?) ORDER BY period',
+                    (limit,)
+                ).fetchall()
+        if game == 'fc3d':
+            return FC3DTable.from_rows(FC3DTable.make_row(*row) for row in rows)
+        return SSQTable.from_rows(
+            SSQTable.make_row(period, date, [int(x) for x in red.split(',')], blue)
+            for period, date, red, blue in rows
+        )
+
+# 中彩网历史页面表格选择器，按优先级排列
+TABLE_SELECTORS = [
+    'table.history-table',
+    'table.kj-table',
+    'table.lott-table',
+    'table[class*="table"]',
+    'table'
+]
+
+def _match_table_class(selector, classes):
+    """判断 class 属性是否满足 TABLE_SELECTORS 中的选择器"""
+    if selector == 'table':
+        return True
+    if selector == 'table[class*="table"]':
+        return 'table' in classes
+    return selector.split('.', 1)[1] in classes.split()
+
+class Bs4TableParser:
+    """BeautifulSoup 解析（兼容后备方案）：构建完整文档树"""
+
+    name = 'bs4'
+
+    def __init__(self):
+        from bs4 import BeautifulSoup
+        self._soup = BeautifulSoup
+
+    def tables(self, html):
+        """按选择器优先级依次返回表格，每个表格为单元格文本的行列表"""
+        soup = self._soup(html, 'html.parser')
+        for selector in TABLE_SELECTORS:
+            table = soup.select_one(selector)
+            if table:
+                yield [
+                    [cell.get_text(strip=True) for cell in row.find_all(['td', 'th'])]
+                    for row in table.find_all('tr')
+                ]
+
+class LxmlTableParser:
+    """lxml 解析：C 实现的 HTML 解析器，用 XPath 定位表格"""
+
+    name = 'lxml'
+    XPATHS = {
+        'table[class*="table"]': '//table[contains(@class, "table")]',
+        'table': '//table'
+    }
+
+    def __init__(self):
+        from lxml import html as lxml_html
+        self._lxml_html = lxml_html
+
+    def tables(self, html):
+        root = self._lxml_html.fromstring(html)
+        for selector in TABLE_SELECTORS:
+            xpath = self.XPATHS.get(selector)
+            if xpath is None:
+                cls = selector.split('.', 1)[1]
+                xpath = f'//table[contains(concat(" ", normalize-space(@class), " "), " {cls} ")]'
+            found = root.xpath(xpath)
+            if found:
+                yield [
+                    [''.join(t.strip() for t in cell.itertext()) for cell in row.iter('td', 'th')]
+                    for row in found[0].iter('tr')
+                ]
+
+class _TableTokenizer(HTMLParser):
+    """流式扫描 HTML，只收集表格的行和单元格文本，不构建文档树"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tables = []
+        self._stack = []
+        self._row = None
+        self._cell = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'table':
+            table = {'class': dict(attrs).get('class') or '', 'rows': []}
+            self.tables.append(table)
+            self._stack.append(table)
+        elif not self._stack:
+            return
+        elif tag == 'tr':
+            self._end_cell()
+            self._row = []
+            self._stack[-1]['rows'].append(self._row)
+        elif tag in ('td', 'th') and self._row is not None:
+            self._end_cell()
+            self._cell = []
+
+    def handle_endtag(self, tag):
+        if tag in ('td', 'th'):
+            self._end_cell()
+        elif tag == 'tr':
+            self._end_cell()
+            self._row = None
+        elif tag == 'table' and self._stack:
+            self._end_cell()
+            self._row = None
+            self._stack.pop()
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            text = data.strip()
+            if text:
+                self._cell.append(text)
+
+    def _end_cell(self):
+        if self._cell is not None and self._row is not None:
+            self._row.append(''.join(self._cell))
+        self._cell = None
+
+class StreamTableParser:
+    """标准库流式解析：逐个标签扫描，内存只保存表格单元格文本"""
+
+    name = 'stream'
+
+    def tables(self, html):
+        tokenizer = _TableTokenizer()
+        tokenizer.feed(html)
+        tokenizer.close()
+        for selector in TABLE_SELECTORS:
+            for table in tokenizer.tables:
+                if _match_table_class(selector, table['class']):
+                    yield table['rows']
+                    break
+
+HTML_PARSERS = {
+    'lxml': LxmlTableParser,
+    'stream': StreamTableParser,
+    'bs4': Bs4TableParser
+}
+
+def create_html_parser(name=None):
+    """按名称创建 HTML 解析后端；未指定时优先 lxml，未安装则使用流式解析"""
+    names = [name] if name else ['lxml', 'stream']
+    for candidate in names:
+        try:
+            return HTML_PARSERS[candidate]()
+        except ImportError:
+            logger.warning(f"HTML 解析后端 {candidate} 不可用")
+        except KeyError:
+            logger.warning(f"未知的 HTML 解析后端 {candidate}")
+    return Bs4TableParser()
+
+class SingleFlight:
+    """同一 key 的并发调用只执行一次，其余调用方等待并共享同一结果"""
+
+    class _Call:
+        __slots__ = ('event', 'result', 'error')
+
+        def __init__(self):
+            self.event = threading.Event()
+            self.result = None
+            self.error = None
+
     def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+        return call.result
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    parts = []
+    for name, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{name}="{value}"')
+    return '{' + ','.join(parts) + '}'
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """只增计数器，按标签值分别计数"""
+
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield self.name, list(zip(self.labelnames, key)), value
+
+class Histogram:
+    """直方图：按桶累计观测值，输出 _bucket/_sum/_count"""
+
+    type = 'histogram'
+    # 默认桶适用于以秒计的耗时
+    DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # 每个桶的非累计计数（最后一个为 +Inf）、总和
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def time(self, **labels):
+        """上下文管理器：记录代码块耗时"""
+        return _Timer(self, labels)
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        for key, (counts, total) in items:
+            labels = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                yield f'{self.name}_bucket', labels + [('le', _format_value(float(bound)))], cumulative
+            yield f'{self.name}_sum', labels, total
+            yield f'{self.name}_count', labels, cumulative
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+class MetricsRegistry:
+    """进程内指标注册表，按 Prometheus 文本格式输出。
+    多 worker 部署时每个进程各自计数，由 Prometheus 按实例抓取"""
+
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=Histogram.DEFAULT_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+metrics = MetricsRegistry()
+UPSTREAM_LATENCY = metrics.histogram(
+    'lottery_upstream_request_seconds', '上游数据源单次请求耗时', ('source',))
+UPSTREAM_REQUESTS = metrics.counter(
+    'lottery_upstream_requests_total', '上游数据源请求次数（outcome: success/failure/timeout）', ('source', 'outcome'))
+PARSE_LATENCY = metrics.histogram(
+    'lottery_parse_seconds', '各解析函数耗时', ('parser',))
+CACHE_REQUESTS = metrics.counter(
+    'lottery_cache_requests_total', '开奖数据缓存读取次数（result: hit/miss/stale）', ('game', 'result'))
+ROUTE_LATENCY = metrics.histogram(
+    'lottery_http_request_seconds', '接口请求耗时', ('route', 'method', 'status'))
+ROUTE_RESPONSE_SIZE = metrics.histogram(
+    'lottery_http_response_bytes', '接口响应体大小', ('route',),
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304))
+
+# 超过该耗时（毫秒）的接口请求写入慢请求日志
+SLOW_REQUEST_MS = float(os.environ.get('LOTTERY_SLOW_REQUEST_MS', 1000))
+
+class RequestTimings:
+    """单个接口请求内各阶段耗时，输出为 Server-Timing 响应头"""
+
+    def __init__(self):
+        self.phases = []
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds, desc=None):
+        with self._lock:
+            # 同名阶段（如多次重试）依次编号
+            count = self._seen.get(name, 0) + 1
+            self._seen[name] = count
+            if count > 1:
+                name = f'{name}-{count}'
+            self.phases.append((name, seconds * 1000, desc))
+
+    def header(self, total_ms):
+        parts = []
+        for name, ms, desc in self.phases + [('total', total_ms, None)]:
+            part = f'{name};dur={ms:.1f}'
+            if desc:
+                part += f';desc="{desc}"'
+            parts.append(part)
+        return ', '.join(parts)
+
+    def records(self):
+        return [{'phase': name, 'ms': round(ms, 1), **({'desc': desc} if desc else {})}
+                for name, ms, desc in self.phases]
+
+# 当前接口请求的 RequestTimings；后台线程中为 None
+_request_timings = contextvars.ContextVar('request_timings', default=None)
+
+def record_phase(name, seconds, desc=None):
+    """记录当前请求的一个阶段耗时；不在接口请求中时忽略"""
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.add(name, seconds, desc)
+
+@contextmanager
+def timed_phase(name, desc=None):
+    """上下文管理器：把代码块耗时记为当前请求的一个阶段"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(name, time.perf_counter() - start, desc)
+
+def timed_parser(fn):
+    """装饰器：按函数名记录解析耗时"""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            PARSE_LATENCY.observe(elapsed, parser=fn.__name__)
+            record_phase('parse', elapsed, fn.__name__)
+    return wrapper
+
+class TokenBucket:
+    """令牌桶限流：平均每秒 rate 个请求，最多允许 burst 个突发；多线程共享"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """取一个令牌，不足时阻塞等待"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_time = (1 - self._tokens) / self.rate
+            time.sleep(wait_time)
+
+class CircuitBreaker:
+    """数据源熔断器：连续失败达到阈值后断开，冷却期后放行一次半开探测，
+    再次失败时冷却期按指数增长（带随机抖动）"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30, max_reset_timeout=1800):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout  # 秒
+        self.max_reset_timeout = max_reset_timeout  # 秒
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.retry_at = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """是否允许发起请求；断开状态下冷却期结束后只放行一个探测请求
+        （转为半开状态的调用方即探测方，半开期间其余请求都被拒绝，直到探测结果记录）"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.time() >= self.retry_at:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"数据源 {self.name} 已恢复")
+            self.state = self.CLOSED
+            self.failures = 0
+            self.trips = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self._trip()
+
+    def snapshot(self):
+        """返回当前状态，用于健康检查"""
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutiveFailures': self.failures,
+                'trips': self.trips,
+                'retryAt': datetime.fromtimestamp(self.retry_at, BEIJING_TZ).isoformat()
+                if self.state != self.CLOSED else None
+            }
+
+    def _trip(self):
+        self.trips += 1
+        timeout = min(self.reset_timeout * 2 ** (self.trips - 1), self.max_reset_timeout)
+        delay = random.uniform(timeout / 2, timeout)
+        self.retry_at = time.time() + delay
+        self.state = self.OPEN
+        logger.warning(f"数据源 {self.name} 连续失败{self.failures}次，熔断{delay:.1f}秒")
+
+class RealLotteryDataScraper:
+    def __init__(self, store=None, cwl_base=None, zhcw_base=None):
+        self.store = store
+        # 上游地址：LOTTERY_UPSTREAM_BASE 同时替换两个数据源，便于指向本地替身服务器做负载和故障测试
+        upstream = os.environ.get('LOTTERY_UPSTREAM_BASE')
+        self.cwl_base = (cwl_base or os.environ.get('LOTTERY_CWL_BASE') or upstream or CWL_BASE_URL).rstrip('/')
+        self.zhcw_base = (zhcw_base or os.environ.get('LOTTERY_ZHCW_BASE') or upstream or ZHCW_BASE_URL).rstrip('/')
+        # 合并并发的同步和上游请求
+        self._flight = SingleFlight()
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -53,69 +1193,200 @@ class RealLotteryDataScraper:
             'Upgrade-Insecure-Requests': '1'
         })
         
-        # 重试配置
+        # 重试配置：指数退避，带随机抖动
         self.max_retries = 3
         self.retry_delay = 2  # 秒
+        self.max_retry_delay = 10  # 秒
+        
+        # 各数据源熔断器，跨请求共享
+        self.breakers = {
+            'cwl': CircuitBreaker('cwl'),
+            'zhcw': CircuitBreaker('zhcw')
+        }
         
         # 配置请求超时
         self.timeout = (5, 15)  # (连接超时, 读取超时)
+        # 上游请求限流（TokenBucket），默认不限；批量回填历史数据时设置
+        self.rate_limiter = None
+        
+        # 数据源获取方式：sequential 依次回退，hedged 主源超过 hedge_delay 未返回时
+        # 并发请求备用源，race 同时请求全部数据源；均取最先返回的有效结果
+        self.fetch_mode = os.environ.get('LOTTERY_FETCH_MODE', 'hedged')
+        self.hedge_delay = float(os.environ.get('LOTTERY_HEDGE_DELAY', 1.5))  # 秒
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='source')
+        
+        # 中彩网页面解析后端（LOTTERY_HTML_PARSER=lxml|stream|bs4）；
+        # 首次回退到中彩网时才创建，主源正常时不导入 lxml / BeautifulSoup
+        self._html_parser = None
+        self._compat_parser = None
+    
+    @property
+    def html_parser(self):
+        if self._html_parser is None:
+            self._html_parser = create_html_parser(os.environ.get('LOTTERY_HTML_PARSER'))
+        return self._html_parser
+    
+    @html_parser.setter
+    def html_parser(self, parser):
+        self._html_parser = parser
+    
+    @property
+    def compat_parser(self):
+        """BeautifulSoup 兼容解析，选定后端未解析出数据时使用"""
+        if self._compat_parser is None:
+            self._compat_parser = Bs4TableParser()
+        return self._compat_parser
     
     def get_fc3d_data(self, limit=300):
-        """获取福彩3D历史数据"""
+        """获取福彩3D历史数据（FC3DTable）"""
         try:
-            # 从中国福彩网获取数据
-            data = self._scrape_fc3d_from_cwl()
-            if data and len(data) > 0:
-                logger.info(f"成功从中国福彩网获取福彩3D数据，共{len(data)}期")
-                return data[:limit]
-            
-            # 从中彩网获取数据
-            data = self._scrape_fc3d_from_zhcw()
-            if data and len(data) > 0:
-                logger.info(f"成功从中彩网获取福彩3D数据，共{len(data)}期")
-                return data[:limit]
-            
-            logger.error("无法获取福彩3D数据")
-            return []
+            self.sync_fc3d()
+            data = self.store.load('fc3d', limit)
+            if not data:
+                logger.error("无法获取福彩3D数据")
+            return data
             
         except Exception as e:
             logger.error(f"获取福彩3D数据失败: {e}")
-            return []
+            return FC3DTable()
     
     def get_ssq_data(self, limit=300):
-        """获取双色球历史数据"""
+        """获取双色球历史数据（SSQTable）"""
         try:
-            # 从中国福彩网获取数据
-            data = self._scrape_ssq_from_cwl()
-            if data and len(data) > 0:
-                logger.info(f"成功从中国福彩网获取双色球数据，共{len(data)}期")
-                return data[:limit]
-            
-            # 从中彩网获取数据
-            data = self._scrape_ssq_from_zhcw()
-            if data and len(data) > 0:
-                logger.info(f"成功从中彩网获取双色球数据，共{len(data)}期")
-                return data[:limit]
-            
-            logger.error("无法获取双色球数据")
-            return []
+            self.sync_ssq()
+            data = self.store.load('ssq', limit)
+            if not data:
+                logger.error("无法获取双色球数据")
+            return data
             
         except Exception as e:
             logger.error(f"双色球 API错误: {e}")
-            return []
+            return SSQTable()
+    
+    def sync_fc3d(self):
+        """增量同步福彩3D数据到本地存储，返回新增期数"""
+        return self._sync('fc3d', '福彩3D', self._scrape_fc3d_from_cwl, self._scrape_fc3d_from_zhcw)
+    
+    def sync_ssq(self):
+        """增量同步双色球数据到本地存储，返回新增期数"""
+        return self._sync('ssq', '双色球', self._scrape_ssq_from_cwl, self._scrape_ssq_from_zhcw)
     
-    def _scrape_fc3d_from_cwl(self):
-        """从中国福彩网获取福彩3D数据"""
+    def _sync(self, game, label, scrape_cwl, scrape_zhcw):
+        """同一彩种的并发同步只执行一次"""
+        return self._flight.do((game, 'sync', None), self._sync_once, game, label, scrape_cwl, scrape_zhcw)
+    
+    def _sync_once(self, game, label, scrape_cwl, scrape_zhcw):
+        """只向上游请求本地最新期号之后的开奖数据并写入本地存储"""
+        latest = self.store.latest_period(game)
+        since = str(int(latest) + 1) if latest else None
+        
+        # 中国福彩网为主源，中彩网为备用源；按 (彩种, 数据源, 起始期号) 合并并发请求
+        sources = [
+            ('中国福彩网', lambda cancel: self._flight.do((game, 'cwl', since), scrape_cwl, since, cancel)),
+            ('中彩网', lambda cancel: self._flight.do((game, 'zhcw', None), scrape_zhcw, cancel))
+        ]
+        # 本地存储为空时，首次获取的数据就是之后增量同步的起点：中彩网页面只有最近若干期，
+        # 以它为起点会使中国福彩网 300 期窗口中更早的部分再也不会被补齐，因此只在福彩网失败时回退
+        data, source = self._fetch_first(sources, None if latest else 'sequential')
+        
+        if latest and data:
+            data = data.after(latest)
+        if not data:
+            return 0
+        
+        added = self.store.upsert(game, data)
+        logger.info(f"成功从{source}获取{label}数据，新增{added}期")
+        return added
+    
+    def _fetch_first(self, sources, mode=None):
+        """按 mode（默认 fetch_mode）请求各数据源，返回最先得到的有效结果 (data, 数据源名称)"""
+        mode = mode or self.fetch_mode
+        if mode == 'sequential':
+            for label, fetch in sources:
+                data = fetch(None)
+                if data is not None:
+                    return data, label
+            return None, None
+        
+        cancel = threading.Event()
+        futures = {}
+        pending = set()
+        
+        def launch(index):
+            label, fetch = sources[index]
+            # 在当前上下文中运行，使请求阶段计时能记录到后台线程里的上游请求
+            future = self._executor.submit(contextvars.copy_context().run, fetch, cancel)
+            futures[future] = label
+            pending.add(future)
+        
+        launch(0)
+        launched = 1
+        if mode == 'race':
+            while launched < len(sources):
+                launch(launched)
+                launched += 1
+        
         try:
-            url = "https://www.cwl.gov.cn/cwl_admin/front/cwlkj/search/kjxx/findDrawNotice"
+            while pending:
+                hedge = launched < len(sources)
+                done, _ = wait(pending, timeout=self.hedge_delay if hedge else None,
+                               return_when=FIRST_COMPLETED)
+                pending -= done
+                for future in done:
+                    try:
+                        data = future.result()
+                    except Exception as e:
+                        logger.warning(f"{futures[future]}请求失败: {e}")
+                        data = None
+                    if data is not None:
+                        return data, futures[future]
+                # 超过对冲延迟或已有数据源失败时，启动下一个数据源
+                if hedge and (not done or not pending):
+                    launch(launched)
+                    launched += 1
+            return None, None
+        finally:
+            # 通知其余数据源停止重试
+            cancel.set()
+            for future in pending:
+                future.cancel()
+    
+    def fetch_range(self, game, issue_start, issue_end):
+        """从中国福彩网获取期号区间 [issue_start, issue_end] 的开奖数据（DrawTable）；
+        区间内没有开奖时返回空表，失败时返回 None"""
+        scrape = self._scrape_fc3d_from_cwl if game == 'fc3d' else self._scrape_ssq_from_cwl
+        return scrape(since=issue_start, until=issue_end)
+    
+    def _cwl_params(self, name, since=None, until=None):
+        """构造 findDrawNotice 请求参数；指定 since 时只请求该期号之后（到 until 为止）的数据"""
+        if since:
             params = {
-                'name': '3d',
-                'issueCount': '300',
-                'issueStart': '',
-                'issueEnd': '',
+                'name': name,
+                'issueCount': '',
+                'issueStart': since,
+                'issueEnd': until or f"{datetime.now().year}999",
                 'dayStart': '',
                 'dayEnd': ''
             }
+            if until:
+                # 指定区间时一页取完整个区间
+                params['pageNo'] = '1'
+                params['pageSize'] = str(int(until) - int(since) + 1)
+            return params
+        return {
+            'name': name,
+            'issueCount': '300',
+            'issueStart': '',
+            'issueEnd': '',
+            'dayStart': '',
+            'dayEnd': ''
+        }
+    
+    def _scrape_fc3d_from_cwl(self, since=None, cancel=None, until=None):
+        """从中国福彩网获取福彩3D数据；失败或被取消时返回 None"""
+        try:
+            url = self.cwl_base + CWL_DRAW_NOTICE_PATH
+            params = self._cwl_params('3d', since, until)
             
             headers = {
                 'Accept': 'application/json, text/javascript, */*; q=0.01',
@@ -124,64 +1395,78 @@ class RealLotteryDataScraper:
                 'X-Requested-With': 'XMLHttpRequest'
             }
             
+            breaker = self.breakers['cwl']
             for retry in range(self.max_retries):
+                if cancel is not None and cancel.is_set():
+                    return None
+                if not breaker.allow():
+                    logger.warning("中国福彩网处于熔断状态，跳过请求")
+                    return None
                 try:
-                    response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+                    response = self._get('cwl', url, params=params, headers=headers)
                     if response.status_code == 200:
                         data = self._parse_fc3d_from_cwl_api(response)
-                        if data and len(data) > 0:
+                        if data:
+                            breaker.record_success()
+                            return data
+                        if data is not None and since:
+                            # 增量请求时没有新开奖属于正常情况；响应无效（data 为 None）按失败重试
+                            breaker.record_success()
                             return data
+                    breaker.record_failure()
                 except requests.Timeout:
+                    breaker.record_failure()
                     logger.warning(f"中国福彩网请求超时，第 {retry + 1} 次重试")
-                    if retry < self.max_retries - 1:
-                        time.sleep(self.retry_delay)
                 except Exception as e:
+                    breaker.record_failure()
                     logger.error(f"请求中国福彩网失败: {e}")
-                    if retry < self.max_retries - 1:
-                        time.sleep(self.retry_delay)
+                if retry < self.max_retries - 1:
+                    self._retry_wait(self._backoff(retry), cancel)
             
-            return []
+            return None
             
         except Exception as e:
             logger.error(f"从中国福彩网获取福彩3D数据失败: {e}")
-            return []
+            return None
     
-    def _scrape_fc3d_from_zhcw(self):
-        """从中彩网获取福彩3D数据"""
+    def _scrape_fc3d_from_zhcw(self, cancel=None):
+        """从中彩网获取福彩3D数据；失败或被取消时返回 None"""
         try:
             urls = [
-                "https://www.zhcw.com/kjxx/3d/",
-                "https://www.zhcw.com/kj/3d/"
+                f"{self.zhcw_base}/kjxx/3d/",
+                f"{self.zhcw_base}/kj/3d/"
             ]
             
+            breaker = self.breakers['zhcw']
             for url in urls:
+                if cancel is not None and cancel.is_set():
+                    return None
+                if not breaker.allow():
+                    logger.warning("中彩网处于熔断状态，跳过请求")
+                    return None
                 try:
-                    response = self.session.get(url, timeout=self.timeout)
+                    response = self._get('zhcw', url)
                     if response.status_code == 200:
                         data = self._parse_fc3d_from_zhcw_html(response)
                         if data and len(data) > 0:
+                            breaker.record_success()
                             return data
+                    breaker.record_failure()
                 except Exception as e:
+                    breaker.record_failure()
                     logger.warning(f"中彩网URL {url} 失败: {e}")
             
-            return []
+            return None
             
         except Exception as e:
             logger.error(f"从中彩网获取福彩3D数据失败: {e}")
-            return []
+            return None
     
-    def _scrape_ssq_from_cwl(self):
-        """从中国福彩网获取双色球数据"""
+    def _scrape_ssq_from_cwl(self, since=None, cancel=None, until=None):
+        """从中国福彩网获取双色球数据；失败或被取消时返回 None"""
         try:
-            url = "https://www.cwl.gov.cn/cwl_admin/front/cwlkj/search/kjxx/findDrawNotice"
-            params = {
-                'name': 'ssq',
-                'issueCount': '300',
-                'issueStart': '',
-                'issueEnd': '',
-                'dayStart': '',
-                'dayEnd': ''
-            }
+            url = self.cwl_base + CWL_DRAW_NOTICE_PATH
+            params = self._cwl_params('ssq', since, until)
             
             headers = {
                 'Accept': 'application/json, text/javascript, */*; q=0.01',
@@ -190,57 +1475,119 @@ class RealLotteryDataScraper:
                 'X-Requested-With': 'XMLHttpRequest'
             }
             
+            breaker = self.breakers['cwl']
             for retry in range(self.max_retries):
+                if cancel is not None and cancel.is_set():
+                    return None
+                if not breaker.allow():
+                    logger.warning("中国福彩网处于熔断状态，跳过请求")
+                    return None
                 try:
-                    response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+                    response = self._get('cwl', url, params=params, headers=headers)
                     if response.status_code == 200:
                         data = self._parse_ssq_from_cwl_api(response)
-                        if data and len(data) > 0:
+                        if data:
+                            breaker.record_success()
+                            return data
+                        if data is not None and since:
+                            # 增量请求时没有新开奖属于正常情况；响应无效（data 为 None）按失败重试
+                            breaker.record_success()
                             return data
+                    breaker.record_failure()
                 except requests.Timeout:
+                    breaker.record_failure()
                     logger.warning(f"中国福彩网请求超时，第 {retry + 1} 次重试")
-                    if retry < self.max_retries - 1:
-                        time.sleep(self.retry_delay)
                 except Exception as e:
+                    breaker.record_failure()
                     logger.error(f"请求中国福彩网失败: {e}")
-                    if retry < self.max_retries - 1:
-                        time.sleep(self.retry_delay)
+                if retry < self.max_retries - 1:
+                    self._retry_wait(self._backoff(retry), cancel)
             
-            return []
+            return None
             
         except Exception as e:
             logger.error(f"从中国福彩网获取双色球数据失败: {e}")
-            return []
+            return None
     
-    def _scrape_ssq_from_zhcw(self):
-        """从中彩网获取双色球数据"""
+    def _scrape_ssq_from_zhcw(self, cancel=None):
+        """从中彩网获取双色球数据；失败或被取消时返回 None"""
         try:
             urls = [
-                "https://www.zhcw.com/kjxx/ssq/",
-                "https://www.zhcw.com/kj/ssq/"
+                f"{self.zhcw_base}/kjxx/ssq/",
+                f"{self.zhcw_base}/kj/ssq/"
             ]
             
+            breaker = self.breakers['zhcw']
             for url in urls:
+                if cancel is not None and cancel.is_set():
+                    return None
+                if not breaker.allow():
+                    logger.warning("中彩网处于熔断状态，跳过请求")
+                    return None
                 try:
-                    response = self.session.get(url, timeout=self.timeout)
+                    response = self._get('zhcw', url)
                     if response.status_code == 200:
                         data = self._parse_ssq_from_zhcw_html(response)
                         if data and len(data) > 0:
+                            breaker.record_success()
                             return data
+                    breaker.record_failure()
                 except Exception as e:
+                    breaker.record_failure()
                     logger.warning(f"中彩网URL {url} 失败: {e}")
             
-            return []
+            return None
             
         except Exception as e:
             logger.error(f"从中彩网获取双色球数据失败: {e}")
-            return []
+            return None
     
+    def _get(self, source, url, **kwargs):
+        """请求上游并记录耗时和结果"""
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        start = time.perf_counter()
+        outcome = 'failure'
+        try:
+            response = self.session.get(url, timeout=self.timeout, **kwargs)
+            if response.status_code == 200:
+                outcome = 'success'
+            return response
+        except requests.Timeout:
+            outcome = 'timeout'
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            UPSTREAM_LATENCY.observe(elapsed, source=source)
+            UPSTREAM_REQUESTS.inc(source=source, outcome=outcome)
+            record_phase(f'upstream-{source}', elapsed, outcome)
+    
+    def _backoff(self, retry):
+        """第 retry 次失败后的等待时间：指数增长并加入随机抖动"""
+        delay = min(self.retry_delay * 2 ** retry, self.max_retry_delay)
+        return random.uniform(delay / 2, delay)
+    
+    def breaker_states(self):
+        """返回各数据源熔断器状态"""
+        return {name: breaker.snapshot() for name, breaker in self.breakers.items()}
+    
+    def _retry_wait(self, delay, cancel=None):
+        """重试前等待；被取消时立即返回"""
+        if cancel is not None:
+            cancel.wait(delay)
+        else:
+            time.sleep(delay)
+    
+    @timed_parser
     def _parse_fc3d_from_cwl_api(self, response):
-        """从中国福彩网API解析福彩3D数据"""
+        """从中国福彩网API解析福彩3D数据；响应无效（非 JSON、截断、state 非 0）时返回 None，
+        有效响应但没有开奖记录时返回空表"""
         try:
             result = response.json()
-            if result.get('state') == 0 and result.get('result'):
+            if result.get('state') != 0 or not isinstance(result.get('result'), list):
+                logger.warning(f"中国福彩网福彩3D响应无效: state={result.get('state')}")
+                return None
+            if result['result']:
                 data = []
                 for item in result['result']:
                     try:
@@ -255,105 +1602,83 @@ class RealLotteryDataScraper:
                         if not date or not period:
                             continue
                             
-                        # 计算统计数据
-                        digits = [int(d) for d in number]
-                        data.append({
-                            'period': period,
-                            'date': date,
-                            'number': number,
-                            'sum': sum(digits),
-                            'span': max(digits) - min(digits),
-                            'oddCount': len([d for d in digits if d % 2 == 1]),
-                            'evenCount': len([d for d in digits if d % 2 == 0]),
-                            'bigCount': len([d for d in digits if d >= 5]),
-                            'smallCount': len([d for d in digits if d < 5])
-                        })
+                        data.append(FC3DTable.make_row(period, date, number))
                     except Exception as e:
                         logger.debug(f"解析单条福彩3D数据失败: {e}")
                         continue
-                        
-                return data
-            return []
+                
+                # 统计数据在 FC3DTable.stats() 中整批计算
+                return FC3DTable.from_rows(data)
+            return FC3DTable()
         except Exception as e:
             logger.error(f"解析福彩3D数据失败: {e}")
-            return []
+            return None
     
+    @timed_parser
     def _parse_fc3d_from_zhcw_html(self, response):
         """从中彩网HTML解析福彩3D数据"""
         try:
-            data = []
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # 尝试多种表格选择器
-            selectors = [
-                'table.history-table',
-                'table.kj-table',
-                'table.lott-table',
-                'table[class*="table"]',
-                'table'
-            ]
-            
-            for selector in selectors:
-                table = soup.select_one(selector)
-                if table:
-                    rows = table.find_all('tr')[1:]  # 跳过表头
-                    for row in rows:
-                        try:
-                            cells = row.find_all(['td', 'th'])
-                            if len(cells) < 3:
-                                continue
-                            
-                            # 提取期号
-                            period_text = cells[0].get_text(strip=True)
-                            period_match = re.search(r'\d{7}', period_text)
-                            if not period_match:
-                                continue
-                            period = period_match.group()
-                            
-                            # 提取日期
-                            date_text = cells[1].get_text(strip=True)
-                            date_match = re.search(r'\d{4}-\d{2}-\d{2}', date_text)
-                            if not date_match:
-                                continue
-                            date = date_match.group()
-                            
-                            # 提取号码
-                            number_text = cells[2].get_text(strip=True)
-                            number_match = re.search(r'\d{3}', number_text)
-                            if not number_match:
-                                continue
-                            number = number_match.group()
-                            
-                            # 计算统计数据
-                            digits = [int(d) for d in number]
-                            data.append({
-                                'period': period,
-                                'date': date,
-                                'number': number,
-                                'sum': sum(digits),
-                                'span': max(digits) - min(digits),
-                                'oddCount': len([d for d in digits if d % 2 == 1]),
-                                'evenCount': len([d for d in digits if d % 2 == 0]),
-                                'bigCount': len([d for d in digits if d >= 5]),
-                                'smallCount': len([d for d in digits if d < 5])
-                            })
-                        except Exception as e:
-                            logger.debug(f"解析单条福彩3D数据失败: {e}")
-                            continue
-                    
-                    if data:
-                        break
-            
-            return data
+            return self._parse_zhcw_tables(response.text, self._fc3d_from_cells, FC3DTable)
         except Exception as e:
             logger.error(f"解析福彩3D HTML数据失败: {e}")
-            return []
+            return FC3DTable()
+    
+    def _fc3d_from_cells(self, cells):
+        """从表格一行的单元格文本解析福彩3D数据行"""
+        if len(cells) < 3:
+            return None
+        
+        # 提取期号
+        period_match = re.search(r'\d{7}', cells[0])
+        if not period_match:
+            return None
+        
+        # 提取日期
+        date_match = re.search(r'\d{4}-\d{2}-\d{2}', cells[1])
+        if not date_match:
+            return None
+        
+        # 提取号码
+        number_match = re.search(r'\d{3}', cells[2])
+        if not number_match:
+            return None
+        
+        return FC3DTable.make_row(period_match.group(), date_match.group(), number_match.group())
     
+    def _zhcw_parsers(self):
+        """依次返回选定的解析后端和 BeautifulSoup 兼容解析（用到时才创建）"""
+        yield self.html_parser
+        if self.html_parser.name != Bs4TableParser.name:
+            yield self.compat_parser
+    
+    def _parse_zhcw_tables(self, html, parse_row, table_cls):
+        """用选定的解析后端提取表格并逐行解析；未解析出数据时回退到 BeautifulSoup"""
+        for parser in self._zhcw_parsers():
+            for rows in parser.tables(html):
+                data = []
+                for cells in rows[1:]:  # 跳过表头
+                    try:
+                        row = parse_row(cells)
+                        if row:
+                            data.append(row)
+                    except Exception as e:
+                        logger.debug(f"解析单条数据失败: {e}")
+                        continue
+                if data:
+                    # 统计数据在 DrawTable.stats() 中整批计算
+                    return table_cls.from_rows(data)
+        return table_cls()
+    
+    @timed_parser
     def _parse_ssq_from_cwl_api(self, response):
-        """从中国福彩网API解析双色球数据"""
+        """从中国福彩网API解析双色球数据；响应无效（非 JSON、截断、state 非 0）时返回 None，
+        有效响应但没有开奖记录时返回空表"""
         try:
             result = response.json()
-            if result.get('state') == 0 and result.get('result'):
+            if result.get('state') != 0 or not isinstance(result.get('result'), list):
+                logger.warning(f"中国福彩网双色球响应无效: state={result.get('state')}")
+                return None
+            if result['result']:
                 data = []
                 for item in result['result']:
                     try:
@@ -376,171 +1701,999 @@ class RealLotteryDataScraper:
                         if not date or not period:
                             continue
                             
-                        data.append({
-                            'period': period,
-                            'date': date,
-                            'redBalls': redBalls,
-                            'blueBall': blueBall,
-                            'redSum': sum(redBalls),
-                            'redOddCount': len([n for n in redBalls if n % 2 == 1]),
-                            'redEvenCount': len([n for n in redBalls if n % 2 == 0]),
-                            'redBigCount': len([n for n in redBalls if n > 16]),
-                            'redSmallCount': len([n for n in redBalls if n <= 16])
-                        })
+                        data.append(SSQTable.make_row(period, date, redBalls, blueBall))
                     except Exception as e:
                         logger.debug(f"解析单条双色球数据失败: {e}")
                         continue
-                        
-                return data
-            return []
+                
+                # 统计数据在 SSQTable.stats() 中整批计算
+                return SSQTable.from_rows(data)
+            return SSQTable()
         except Exception as e:
             logger.error(f"解析双色球数据失败: {e}")
-            return []
+            return None
     
+    @timed_parser
     def _parse_ssq_from_zhcw_html(self, response):
         """从中彩网HTML解析双色球数据"""
         try:
-            data = []
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # 尝试多种表格选择器
-            selectors = [
-                'table.history-table',
-                'table.kj-table',
-                'table.lott-table',
-                'table[class*="table"]',
-                'table'
-            ]
-            
-            for selector in selectors:
-                table = soup.select_one(selector)
-                if table:
-                    rows = table.find_all('tr')[1:]  # 跳过表头
-                    for row in rows:
-                        try:
-                            cells = row.find_all(['td', 'th'])
-                            if len(cells) < 4:
-                                continue
-                            
-                            # 提取期号
-                            period_text = cells[0].get_text(strip=True)
-                            period_match = re.search(r'\d{7}', period_text)
-                            if not period_match:
-                                continue
-                            period = period_match.group()
-                            
-                            # 提取日期
-                            date_text = cells[1].get_text(strip=True)
-                            date_match = re.search(r'\d{4}-\d{2}-\d{2}', date_text)
-                            if not date_match:
-                                continue
-                            date = date_match.group()
-                            
-                            # 提取红球
-                            red_text = cells[2].get_text(strip=True)
-                            red_numbers = re.findall(r'\d{2}', red_text)
-                            if len(red_numbers) != 6:
-                                continue
-                            redBalls = [int(x) for x in red_numbers]
-                            
-                            # 提取蓝球
-                            blue_text = cells[3].get_text(strip=True)
-                            blue_match = re.search(r'\d{2}', blue_text)
-                            if not blue_match:
-                                continue
-                            blueBall = int(blue_match.group())
-                            
-                            data.append({
-                                'period': period,
-                                'date': date,
-                                'redBalls': redBalls,
-                                'blueBall': blueBall,
-                                'redSum': sum(redBalls),
-                                'redOddCount': len([n for n in redBalls if n % 2 == 1]),
-                                'redEvenCount': len([n for n in redBalls if n % 2 == 0]),
-                                'redBigCount': len([n for n in redBalls if n > 16]),
-                                'redSmallCount': len([n for n in redBalls if n <= 16])
-                            })
-                        except Exception as e:
-                            logger.debug(f"解析单条双色球数据失败: {e}")
-                            continue
-                    
-                    if data:
-                        break
-            
-            return data
+            return self._parse_zhcw_tables(response.text, self._ssq_from_cells, SSQTable)
         except Exception as e:
             logger.error(f"解析双色球HTML数据失败: {e}")
-            return []
+            return SSQTable()
+    
+    def _ssq_from_cells(self, cells):
+        """从表格一行的单元格文本解析双色球数据行"""
+        if len(cells) < 4:
+            return None
+        
+        # 提取期号
+        period_match = re.search(r'\d{7}', cells[0])
+        if not period_match:
+            return None
+        
+        # 提取日期
+        date_match = re.search(r'\d{4}-\d{2}-\d{2}', cells[1])
+        if not date_match:
+            return None
+        
+        # 提取红球
+        red_numbers = re.findall(r'\d{2}', cells[2])
+        if len(red_numbers) != 6:
+            return None
+        redBalls = [int(x) for x in red_numbers]
+        
+        # 提取蓝球
+        blue_match = re.search(r'\d{2}', cells[3])
+        if not blue_match:
+            return None
+        blueBall = int(blue_match.group())
+        
+        return SSQTable.make_row(period_match.group(), date_match.group(), redBalls, blueBall)
 
-# 创建爬虫实例
-scraper = RealLotteryDataScraper()
+class DrawCache:
+    """按开奖时间过期的进程内缓存：过期后先返回旧数据，同时在后台刷新"""
 
-@app.route('/api/fc3d', methods=['GET'])
-def get_fc3d():
-    """获取福彩3D数据API"""
+    def __init__(self, loader, retry_interval=300, on_update=None):
+        self.loader = loader
+        # 已过开奖时间但上游尚未出新一期时的重试间隔（秒）
+        self.retry_interval = retry_interval
+        # 首次加载或有新一期入缓存时的回调 on_update(game, 旧数据（首次加载时为 None）, 新数据)
+        self.on_update = on_update
+        self._entries = {}
+        self._refreshing = set()
+        # 合并同一彩种并发的加载（冷启动时预取线程和多个请求同时未命中）
+        self._flight = SingleFlight()
+        # 由后台预取线程负责刷新的彩种，过期时不再在请求路径上触发刷新
+        self.managed = set()
+        self._lock = threading.Lock()
+
+    def get(self, game):
+        """读取缓存；未命中时同步加载，过期时返回旧数据并触发后台刷新"""
+        start = time.perf_counter()
+        with self._lock:
+            entry = self._entries.get(game)
+        if entry is None:
+            CACHE_REQUESTS.inc(game=game, result='miss')
+            record_phase('cache', time.perf_counter() - start, 'miss')
+            with timed_phase('load'):
+                return self.refresh(game)
+
+        data, expires_at = entry
+        if time.time() >= expires_at:
+            result = 'stale'
+            if game not in self.managed:
+                self._refresh_async(game)
+        else:
+            result = 'hit'
+        CACHE_REQUESTS.inc(game=game, result=result)
+        record_phase('cache', time.perf_counter() - start, result)
+        return data
+
+    def put(self, game, data):
+        """写入缓存，过期时间为下一次开奖时间"""
+        if not data:
+            return
+        # 整批预先计算统计列，之后按 limit 切片时直接复用
+        with timed_phase('stats'):
+            data.stats()
+        now = datetime.now(BEIJING_TZ)
+        if has_latest_draw(game, data, now):
+            expires_at = next_draw_time(game, now).timestamp()
+        else:
+            # 最近一期尚未入库，稍后重试
+            expires_at = now.timestamp() + self.retry_interval
+        with self._lock:
+            previous = self._entries.get(game)
+            self._entries[game] = (data, expires_at)
+        
+        if self.on_update is None:
+            return
+        if previous is None:
+            self.on_update(game, None, data)
+        elif data.latest_period() > previous[0].latest_period():
+            self.on_update(game, previous[0], data)
+
+    def loaded(self, game):
+        """缓存中是否已有该彩种的数据（不触发加载）"""
+        with self._lock:
+            return game in self._entries
+
+    def refresh(self, game):
+        """同步加载最新数据并写入缓存；同一彩种并发调用时只加载一次，其余调用方共享结果"""
+        return self._flight.do(game, self._load, game)
+
+    def _load(self, game):
+        data = self.loader(game)
+        self.put(game, data)
+        return data
+
+    def clear(self):
+        """清空全部缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def _refresh_async(self, game):
+        with self._lock:
+            if game in self._refreshing:
+                return
+            self._refreshing.add(game)
+
+        def run():
+            try:
+                self.refresh(game)
+            except Exception as e:
+                logger.error(f"后台刷新{game}缓存失败: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(game)
+
+        threading.Thread(target=run, name=f'cache-refresh-{game}', daemon=True).start()
+
+class DrawPrefetcher:
+    """后台预取线程：按开奖日历在开奖后轮询上游，拿到新一期后发布到缓存"""
+
+    def __init__(self, scraper, cache, delay=300, min_interval=60, max_interval=900):
+        self.scraper = scraper
+        self.cache = cache
+        # 开奖后等待多久开始轮询（秒）
+        self.delay = delay
+        # 轮询退避区间（秒）
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._stop = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        """启动每个彩种的预取线程（重复调用无副作用）"""
+        with self._lock:
+            if self._threads:
+                return
+            for game in DRAW_SCHEDULE:
+                self.cache.managed.add(game)
+                thread = threading.Thread(target=self._run, args=(game,), name=f'prefetch-{game}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        logger.info("开奖数据预取线程已启动")
+
+    def stop(self):
+        self._stop.set()
+
+    def _sync(self, game):
+        """同步上游并发布到缓存，返回是否已包含最近一次开奖"""
+        try:
+            data = self.cache.refresh(game)
+        except Exception as e:
+            logger.error(f"预取{game}数据失败: {e}")
+            return False
+        return has_latest_draw(game, data)
+
+    def _run(self, game):
+        # 启动时立即预热一次
+        fresh = self._sync(game)
+        interval = self.min_interval
+        while not self._stop.is_set():
+            now = datetime.now(BEIJING_TZ)
+            if fresh:
+                # 等到下一次开奖后再开始轮询
+                wait = (next_draw_time(game, now) - now).total_seconds() + self.delay
+                interval = self.min_interval
+            else:
+                # 新一期尚未出现，指数退避后重试
+                wait = interval
+                interval = min(interval * 2, self.max_interval)
+            if self._stop.wait(wait):
+                return
+            fresh = self._sync(game)
+            if fresh:
+                logger.info(f"预取到{game}最新一期开奖数据")
+
+class AnalysisCache:
+    """按数据版本缓存分析结果，新一期入库后旧版本结果自动失效；
+    窗口由客户端指定，按最近使用淘汰，最多保留 max_entries 个"""
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, game, table, window):
+        version = table.version()
+        key = (game, window)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        result = ANALYZERS[game](table, window)
+        with self._lock:
+            self._entries[key] = (version, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+def dumps_json(payload):
+    """序列化为 UTF-8 JSON 字节（键排序，与 jsonify 一致）"""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+class EncodedResponseCache:
+    """按 ETag 缓存已序列化、已压缩的响应体（identity / gzip / br），
+    同一数据版本的相同请求只序列化和压缩一次"""
+
+    # 小于该字节数的响应不压缩
+    MIN_COMPRESS_SIZE = 512
+    # 压缩发生在未命中的请求路径上：300 期响应用 brotli 11 约 80 毫秒，quality 5 不到 1 毫秒，
+    # 体积只大约 20%（仍不到原始 JSON 的九分之一）
+    GZIP_LEVEL = 6
+    BROTLI_QUALITY = 5
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, etag, version, build_payload):
+        """返回 {编码: 响应体}；未命中时生成并写入缓存"""
+        with self._lock:
+            entry = self._entries.get(etag)
+            if entry is not None:
+                self._entries.move_to_end(etag)
+                return entry[1]
+
+        with timed_phase('build'):
+            payload = build_payload()
+        with timed_phase('serialize'):
+            body = dumps_json(payload)
+        variants = {'identity': body}
+        if len(body) >= self.MIN_COMPRESS_SIZE:
+            with timed_phase('compress'):
+                variants['gzip'] = gzip.compress(body, compresslevel=self.GZIP_LEVEL)
+                if brotli is not None:
+                    variants['br'] = brotli.compress(body, quality=self.BROTLI_QUALITY)
+
+        with self._lock:
+            # 数据版本变化后，旧版本的响应体不会再被命中，直接淘汰
+            for key in [k for k, (v, _) in self._entries.items() if v[0] == version[0] and v != version]:
+                del self._entries[key]
+            self._entries[etag] = (version, variants)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return variants
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+def parse_event_cursor(value):
+    """解析事件游标 'fc3d:2025280,ssq:2025115'（每个彩种已收到的最新期号）为 {彩种: 期号}；
+    无法识别的部分（如旧版的数字编号）忽略，缺少的彩种从保留的事件开始补发"""
+    cursor = {}
+    for part in (value or '').split(','):
+        game, _, period = part.strip().partition(':')
+        if game in DRAW_TABLES and period.isdigit():
+            cursor[game] = int(period)
+    return cursor
+
+def format_event_cursor(cursor):
+    return ','.join(f'{game}:{period}' for game, period in sorted(cursor.items()))
+
+def advance_event_cursor(cursor, events):
+    """返回收到 events 之后的游标"""
+    cursor = dict(cursor)
+    for e in events:
+        cursor[e['game']] = max(cursor.get(e['game'], 0), int(e['draw']['period']))
+    return cursor
+
+class DrawEventBroker:
+    """新开奖事件广播：保存最近的事件供断线重连补发，等待方在条件变量上休眠。
+    客户端位置按彩种分别记录期号（游标），与发布顺序和进程无关：两个彩种同一天开奖、
+    以任意顺序发布都不会漏掉，重连到其他 worker 或重启后的进程时游标仍然有效。
+    在 gunicorn gevent worker 下每个连接只是一个协程，空闲连接几乎不占资源"""
+
+    def __init__(self, history=100):
+        self.history = history
+        self._events = []
+        self._cursor = {}
+        self._cond = threading.Condition()
+
+    def cursor(self):
+        """当前游标：每个彩种已发布的最新期号"""
+        with self._cond:
+            return dict(self._cursor)
+
+    def publish(self, game, draw):
+        """发布一期开奖；同一期重复发布（多次加载、多个数据源）时忽略"""
+        event_id = f"{game}:{draw['period']}"
+        with self._cond:
+            if any(e['id'] == event_id for e in self._events):
+                return
+            self._events.append({'id': event_id, 'game': game, 'draw': draw})
+            del self._events[:-self.history]
+            self._cursor[game] = max(self._cursor.get(game, 0), int(draw['period']))
+            self._cond.notify_all()
+
+    def since(self, cursor, games=None):
+        """返回游标之后（各彩种期号大于游标中该彩种期号）的事件，按发布顺序"""
+        with self._cond:
+            return self._since(cursor, games)
+
+    def wait(self, cursor, timeout, games=None):
+        """等待游标之后的事件，超时返回空列表"""
+        deadline = time.time() + timeout
+        with self._cond:
+            while True:
+                found = self._since(cursor, games)
+                remaining = deadline - time.time()
+                if found or remaining <= 0:
+                    return found
+                self._cond.wait(remaining)
+
+    def _since(self, cursor, games):
+        return [
+            e for e in self._events
+            if (games is None or e['game'] in games) and int(e['draw']['period']) > cursor.get(e['game'], 0)
+        ]
+
+def _publish_new_draws(game, previous, table):
+    """把缓存中新增的开奖推送给订阅方（最多最近 10 期）；首次加载时放入最近 10 期，
+    供从其他 worker 或重启前连接过来的客户端按游标补发"""
+    if previous is None:
+        for record in reversed(table.latest(10).to_records()):
+            draw_events.publish(game, record)
+        return
+    for record in reversed(table.after(previous.latest_period()).latest(10).to_records()):
+        draw_events.publish(game, record)
+    logger.info(f"已推送{game}新开奖事件，最新期号 {table.latest_period()}")
+
+class SharedStoreCoordinator:
+    """同一主机多进程部署（gunicorn 多 worker）时的协调：持有文件锁的进程为主进程，
+    负责抓取上游、写入 SQLite 并发布 mmap 快照；其余进程只读快照（或本地存储），
+    发现快照被替换后重新映射到缓存。主进程退出后文件锁释放，由其他进程接管"""
+
+    def __init__(self, store, cache, prefetcher, lock_path, poll_interval=5):
+        self.store = store
+        self.cache = cache
+        self.prefetcher = prefetcher
+        self.lock_path = lock_path
+        # 从进程检查存储版本、尝试接管的间隔（秒）
+        self.poll_interval = poll_interval
+        self.is_leader = fcntl is None
+        self._lock_file = None
+        self._versions = {}
+        # 预取线程和请求路径可能同时发布同一彩种，发布及 _versions 更新串行进行
+        self._publish_lock = threading.Lock()
+        self._started = False
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """选举主进程并启动后台线程（重复调用无副作用）"""
+        with self._start_lock:
+            if self._started:
+                return
+            self._started = True
+            # 缓存刷新由预取线程（主进程）或版本检查线程（从进程）负责
+            self.cache.managed.update(DRAW_TABLES)
+            self.warm()
+            if self.is_leader or self._try_lock():
+                self._become_leader()
+            else:
+                logger.info(f"进程 {os.getpid()} 以只读方式共享本地开奖数据")
+                threading.Thread(target=self._follow, name='store-follower', daemon=True).start()
+
+    def role(self):
+        return 'leader' if self.is_leader else 'follower'
+
+    def warm(self):
+        """启动时先把上次的快照（没有快照时读本地存储）加载到缓存，不访问上游；
+        之后由预取线程或版本检查线程在后台更新"""
+        started = time.perf_counter()
+        for game in DRAW_TABLES:
+            try:
+                self.cache.put(game, self.load(game))
+            except Exception as e:
+                logger.error(f"预热{game}缓存失败: {e}")
+        warmed = [game for game in DRAW_TABLES if self.cache.loaded(game)]
+        logger.info(f"缓存预热完成: {warmed}，用时 {(time.perf_counter() - started) * 1000:.1f} 毫秒")
+
+    def reload(self):
+        """重新从本地存储加载全部彩种并直接替换缓存（外部写入 SQLite 后调用，如历史回填），
+        主进程同时重写快照；本地存储为空时走缓存加载函数。替换期间缓存不会变空，就绪状态不受影响"""
+        for game in DRAW_TABLES:
+            try:
+                table = self.store.load(game)
+                if not table:
+                    self.cache.refresh(game)
+                    continue
+                if self.is_leader:
+                    self.publish(game, table)
+                self.cache.put(game, table)
+            except Exception as e:
+                logger.error(f"重新加载{game}缓存失败: {e}")
+
+    def ready(self):
+        """全部彩种的数据都已在缓存中"""
+        return all(self.cache.loaded(game) for game in DRAW_TABLES)
+
+    def _try_lock(self):
+        lock_file = open(self.lock_path, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def _become_leader(self):
+        self.is_leader = True
+        logger.info(f"进程 {os.getpid()} 负责抓取上游开奖数据")
+        self.prefetcher.start()
+
+    def publish(self, game, table):
+        """主进程：数据版本变化后重写快照文件（安装 pyarrow 时同时重写 Arrow 历史文件）"""
+        version = table.version()
+        with self._publish_lock:
+            if not table or self._versions.get(game) == version:
+                return
+            try:
+                write_snapshot(snapshot_path(game), game, table)
+                self._versions[game] = version
+            except Exception as e:
+                logger.error(f"写入{game}快照失败: {e}")
+            if HAS_PYARROW:
+                # 供离线分析和预测模型读取的列式历史文件
+                try:
+                    write_history_arrow(history_path(game), game, table)
+                except Exception as e:
+                    logger.error(f"写入{game} Arrow 历史文件失败: {e}")
+
+    def load(self, game):
+        """从进程：优先 mmap 快照文件，没有快照时读取 SQLite"""
+        try:
+            return load_snapshot(snapshot_path(game))
+        except FileNotFoundError:
+            return self.store.load(game)
+
+    def _follow(self):
+        while True:
+            if self._try_lock():
+                self._become_leader()
+                return
+            for game in DRAW_TABLES:
+                try:
+                    self._reload_if_changed(game)
+                except Exception as e:
+                    logger.error(f"读取本地{game}数据失败: {e}")
+            time.sleep(self.poll_interval)
+
+    def _reload_if_changed(self, game):
+        """快照文件被替换（inode 变化）或存储版本变化时重新加载到缓存"""
+        try:
+            st = os.stat(snapshot_path(game))
+            version = ('snapshot', st.st_ino, st.st_mtime_ns)
+        except FileNotFoundError:
+            version = ('store', self.store.version(game))
+        if version != self._versions.get(game):
+            self.cache.put(game, self.load(game))
+            self._versions[game] = version
+
+def _load_draws(game):
+    """缓存加载函数：主进程增量同步后从本地存储读取全部开奖记录（DrawTable）并发布快照，
+    从进程只读快照"""
+    if not coordinator.is_leader:
+        return coordinator.load(game)
+    if game == 'fc3d':
+        table = scraper.get_fc3d_data(limit=None)
+    else:
+        table = scraper.get_ssq_data(limit=None)
+    coordinator.publish(game, table)
+    return table
+
+# 创建本地存储、爬虫和缓存实例
+store = DrawStore(DB_PATH)
+scraper = RealLotteryDataScraper(store)
+draw_events = DrawEventBroker()
+cache = DrawCache(_load_draws, on_update=_publish_new_draws)
+analysis_cache = AnalysisCache()
+response_cache = EncodedResponseCache()
+omission_indexes = {game: OmissionIndex(game) for game in DRAW_TABLES}
+prefetcher = DrawPrefetcher(scraper, cache)
+coordinator = SharedStoreCoordinator(store, cache, prefetcher, DB_PATH + '.lock')
+
+def start_background():
+    """启动后台任务：从本地快照预热缓存，选举抓取进程，启动预取或存储同步线程"""
+    coordinator.start()
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    _request_timings.set(RequestTimings() if request.path.startswith('/api/') else None)
+
+@app.after_request
+def record_request_metrics(resp):
+    """记录接口耗时和响应大小（流式响应只计到开始输出为止），
+    输出 Server-Timing 头，超过阈值的请求写入慢请求日志"""
+    start = g.pop('request_start', None)
+    timings = _request_timings.get()
+    if start is None or timings is None:
+        return resp
+    elapsed = time.perf_counter() - start
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    ROUTE_LATENCY.observe(elapsed, route=route, method=request.method, status=resp.status_code)
+    size = None
+    if not resp.is_streamed:
+        size = resp.calculate_content_length() or 0
+        ROUTE_RESPONSE_SIZE.observe(size, route=route)
+    
+    total_ms = elapsed * 1000
+    resp.headers['Server-Timing'] = timings.header(total_ms)
+    # 前端与接口不同源，允许页面脚本读取 Server-Timing
+    resp.headers['Timing-Allow-Origin'] = '*'
+    if total_ms >= SLOW_REQUEST_MS:
+        record = {
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'route': route,
+            'status': resp.status_code,
+            'bytes': size,
+            'ms': round(total_ms, 1),
+            'phases': timings.records()
+        }
+        logger.warning(f"慢请求 {json.dumps(record, ensure_ascii=False)}")
+    return resp
+
+@app.before_request
+def ensure_background():
+    # 兼容未使用 gunicorn.conf.py 等不经过 __main__ 的启动方式
+    start_background()
+
+def _select_draws(table, args):
+    """按查询参数筛选开奖数据，返回 (筛选结果, 分页信息)；参数非法时抛出 ValueError
+
+    支持 afterPeriod、fromPeriod/toPeriod、fromDate/toDate（YYYY-MM-DD）区间过滤，
+    page/pageSize 分页；未分页时按 limit 取最近若干期（有区间过滤时默认返回整个区间，
+    否则默认 300 期）。分页信息中的 total 为过滤后、截取前的期数。区间均由升序列二分查找得到。
+    """
+    ranged = any(args.get(name) for name in ('afterPeriod', 'fromPeriod', 'toPeriod', 'fromDate', 'toDate'))
+    after_period = args.get('afterPeriod', type=int)
+    if after_period is not None:
+        table = table.after(after_period)
+    
+    from_period = args.get('fromPeriod', type=int)
+    to_period = args.get('toPeriod', type=int)
+    if from_period is not None or to_period is not None:
+        table = table.between('period', from_period, to_period)
+    
+    from_date = args.get('fromDate')
+    to_date = args.get('toDate')
+    if from_date or to_date:
+        try:
+            low = date_to_ordinal(from_date) if from_date else None
+            high = date_to_ordinal(to_date) if to_date else None
+        except ValueError:
+            raise ValueError('fromDate/toDate 格式应为 YYYY-MM-DD')
+        table = table.between('day', low, high)
+    
+    page = args.get('page', type=int)
+    if page is not None:
+        page_size = args.get('pageSize', 20, type=int)
+        if page < 1 or not 1 <= page_size <= 1000:
+            raise ValueError('page 必须大于 0，pageSize 必须在 1 到 1000 之间')
+        total = len(table)
+        return table.page(page, page_size), {'page': page, 'pageSize': page_size, 'total': total}
+    
+    limit = args.get('limit', None if ranged else 300, type=int)
+    return table.latest(limit), {'total': len(table)}
+
+# 开奖数据接口实际使用的查询参数及其类型（与 _select_draws 一致）
+DRAW_QUERY_PARAMS = {
+    'afterPeriod': int,
+    'fromPeriod': int,
+    'toPeriod': int,
+    'fromDate': str,
+    'toDate': str,
+    'page': int,
+    'pageSize': int,
+    'limit': int
+}
+
+def _draw_query_key(args):
+    """开奖数据接口的缓存键：只取 _select_draws 使用的参数并按同样的类型转换，
+    忽略 _=时间戳 之类的无关参数，避免每个新 URL 都重新序列化、压缩并挤出响应缓存"""
+    return tuple((name, args.get(name, type=kind)) for name, kind in DRAW_QUERY_PARAMS.items())
+
+def _validators(game, table, params):
+    """强 ETag（彩种、数据版本、路径和生效参数的摘要）和 Last-Modified（最新一期开奖时间）"""
+    key = f'{game}|{table.version()}|{request.path}|{params!r}'
+    etag = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    schedule = DRAW_SCHEDULE[game]
+    last_modified = datetime.fromordinal(table.columns['day'][-1]).replace(
+        hour=schedule['hour'], minute=schedule['minute'], tzinfo=BEIJING_TZ
+    )
+    return etag, last_modified
+
+def _choose_encoding(variants):
+    """按 Accept-Encoding 选择响应体编码，优先 br，其次 gzip"""
+    for encoding in ('br', 'gzip'):
+        if encoding in variants and request.accept_encodings[encoding]:
+            return encoding
+    return 'identity'
+
+def _conditional_json(game, table, params, build_payload):
+    """带 ETag / Last-Modified 的预序列化、预压缩 JSON 响应；params 为决定响应内容的参数（可哈希），
+    客户端缓存仍有效时返回 304。304 与 200 带同样的（含编码后缀的）ETag，
+    因此先从响应缓存取出各编码的响应体来确定编码，通常直接命中缓存"""
+    etag, last_modified = _validators(game, table, params)
+    variants = response_cache.get(etag, (game, table.version()), build_payload)
+    encoding = _choose_encoding(variants)
+    if request.if_none_match:
+        # 各编码的 ETag 带有编码后缀，验证时任一均可
+        fresh = any(
+            request.if_none_match.contains_weak(tag)
+            for tag in (etag, f'{etag}-gzip', f'{etag}-br')
+        )
+    elif request.if_modified_since:
+        fresh = last_modified.replace(microsecond=0) <= request.if_modified_since
+    else:
+        fresh = False
+    
+    if fresh:
+        resp = make_response('', 304)
+    else:
+        resp = app.response_class(variants[encoding], mimetype='application/json')
+        if encoding != 'identity':
+            resp.headers['Content-Encoding'] = encoding
+    resp.set_etag(etag if encoding == 'identity' else f'{etag}-{encoding}')
+    resp.vary.add('Accept-Encoding')
+    resp.last_modified = last_modified
+    # 允许浏览器和 CDN 缓存，但每次使用前先重新验证
+    resp.cache_control.public = True
+    resp.cache_control.no_cache = True
+    return resp
+
+def _draws_response(game, label):
+    """开奖数据接口"""
     try:
-        limit = request.args.get('limit', 300, type=int)
-        data = scraper.get_fc3d_data(limit)
+        table = cache.get(game)
+        if not table:
+            return jsonify({
+                'success': False,
+                'message': f'无法获取{label}数据',
+                'data': []
+            }), 500
         
-        if data:
+        try:
+            selected, paging = _select_draws(table, request.args)
+        except ValueError as e:
             return jsonify({
+                'success': False,
+                'message': str(e),
+                'data': []
+            }), 400
+        
+        def build_payload():
+            data = selected.to_records()
+            return {
                 'success': True,
                 'data': data,
                 'count': len(data),
-                'source': '真实开奖数据'
-            })
-        else:
-            return jsonify({
-                'success': False,
-                'message': '无法获取福彩3D数据',
-                'data': []
-            }), 500
+                'latestPeriod': table.latest_period(),
+                'source': '真实开奖数据',
+                **paging
+            }
+        
+        return _conditional_json(game, table, _draw_query_key(request.args), build_payload)
             
     except Exception as e:
-        logger.error(f"福彩3D API错误: {e}")
+        logger.error(f"{label} API错误: {e}")
         return jsonify({
             'success': False,
             'message': str(e),
             'data': []
         }), 500
 
+@app.route('/api/fc3d', methods=['GET'])
+def get_fc3d():
+    """获取福彩3D数据API"""
+    return _draws_response('fc3d', '福彩3D')
+
 @app.route('/api/ssq', methods=['GET'])
 def get_ssq():
     """获取双色球数据API"""
+    return _draws_response('ssq', '双色球')
+
+def _analysis_response(game, label):
+    """统计分析接口：windows 为逗号分隔的期数窗口，如 windows=30,100"""
     try:
-        limit = request.args.get('limit', 300, type=int)
-        data = scraper.get_ssq_data(limit)
-        
-        if data:
+        windows = [int(w) for w in request.args.get('windows', '30').split(',') if w.strip()]
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'windows 参数必须为逗号分隔的正整数'
+        }), 400
+    if not windows or len(windows) > 5 or min(windows) <= 0:
+        return jsonify({
+            'success': False,
+            'message': 'windows 参数必须为 1 到 5 个正整数'
+        }), 400
+    
+    try:
+        table = cache.get(game)
+        if not table:
             return jsonify({
-                'success': True,
-                'data': data,
-                'count': len(data),
-                'source': '真实开奖数据'
-            })
-        else:
+                'success': False,
+                'message': f'无法获取{label}数据'
+            }), 500
+        
+        # 响应按请求的窗口返回；超过已有期数的窗口与全部期数的结果相同，
+        # 计算和分析缓存按实际期数进行，实际期数见各窗口的 count
+        windows = list(dict.fromkeys(windows))
+        return _conditional_json(game, table, tuple(windows), lambda: {
+            'success': True,
+            'latestPeriod': table.latest_period(),
+            'windows': {str(w): analysis_cache.get(game, table, min(w, len(table))) for w in windows}
+        })
+    except Exception as e:
+        logger.error(f"{label}分析API错误: {e}")
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+@app.route('/api/fc3d/analysis', methods=['GET'])
+def get_fc3d_analysis():
+    """福彩3D统计分析API"""
+    return _analysis_response('fc3d', '福彩3D')
+
+@app.route('/api/ssq/analysis', methods=['GET'])
+def get_ssq_analysis():
+    """双色球统计分析API"""
+    return _analysis_response('ssq', '双色球')
+
+def _omission_response(game, label):
+    """遗漏查询接口"""
+    try:
+        table = cache.get(game)
+        if not table:
             return jsonify({
                 'success': False,
-                'message': '无法获取双色球数据',
-                'data': []
+                'message': f'无法获取{label}数据'
             }), 500
-            
+        
+        index = omission_indexes[game]
+        
+        def build_payload():
+            index.update(table)
+            return {
+                'success': True,
+                'latestPeriod': index.period,
+                'count': index.count,
+                'omission': index.snapshot()
+            }
+        
+        return _conditional_json(game, table, (), build_payload)
     except Exception as e:
-        logger.error(f"双色球 API错误: {e}")
+        logger.error(f"{label}遗漏API错误: {e}")
         return jsonify({
             'success': False,
-            'message': str(e),
-            'data': []
+            'message': str(e)
         }), 500
 
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8'
+}
+
+def _export_chunks(game, fmt, chunks):
+    """把存储中的原始开奖记录分批编码为 NDJSON 或 CSV 字节串"""
+    if fmt == 'csv':
+        if game == 'fc3d':
+            yield 'period,date,number\n'.encode('utf-8')
+        else:
+            yield 'period,date,red1,red2,red3,red4,red5,red6,blue\n'.encode('utf-8')
+    for rows in chunks:
+        if fmt == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator='\n')
+            if game == 'fc3d':
+                writer.writerows(rows)
+            else:
+                writer.writerows((period, date, *red.split(','), f'{blue:02d}') for period, date, red, blue in rows)
+            yield buffer.getvalue().encode('utf-8')
+        elif game == 'fc3d':
+            yield b''.join(
+                dumps_json({'period': period, 'date': date, 'number': number}) + b'\n'
+                for period, date, number in rows
+            )
+        else:
+            yield b''.join(
+                dumps_json({
+                    'period': period,
+                    'date': date,
+                    'redBalls': [int(x) for x in red.split(',')],
+                    'blueBall': blue
+                }) + b'\n'
+                for period, date, red, blue in rows
+            )
+
+def _gzip_stream(chunks):
+    """逐块 gzip 压缩；每块同步刷新，客户端可以边收边解压"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def _export_response(game, label):
+    """全量历史导出接口：分块从本地存储读取并流式输出，内存占用与历史期数无关"""
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({
+            'success': False,
+            'message': f'format 只支持 {"/".join(EXPORT_FORMATS)}'
+        }), 400
+    
+    try:
+        # 确保本地存储已同步（命中缓存时不访问上游）
+        cache.get(game)
+        body = _export_chunks(game, fmt, store.iter_chunks(game))
+    except Exception as e:
+        logger.error(f"{label}导出API错误: {e}")
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+    gzipped = bool(request.accept_encodings['gzip'])
+    if gzipped:
+        body = _gzip_stream(body)
+    
+    resp = Response(body, content_type=EXPORT_FORMATS[fmt])
+    if gzipped:
+        resp.headers['Content-Encoding'] = 'gzip'
+    resp.vary.add('Accept-Encoding')
+    resp.headers['Content-Disposition'] = f'attachment; filename="{game}_draws.{fmt}"'
+    resp.headers['Cache-Control'] = 'no-cache'
+    resp.headers['X-Accel-Buffering'] = 'no'
+    return resp
+
+@app.route('/api/fc3d/export', methods=['GET'])
+def export_fc3d():
+    """福彩3D全量历史导出API（format=ndjson|csv）"""
+    return _export_response('fc3d', '福彩3D')
+
+@app.route('/api/ssq/export', methods=['GET'])
+def export_ssq():
+    """双色球全量历史导出API（format=ndjson|csv）"""
+    return _export_response('ssq', '双色球')
+
+@app.route('/api/fc3d/omission', methods=['GET'])
+def get_fc3d_omission():
+    """福彩3D各位数字遗漏API"""
+    return _omission_response('fc3d', '福彩3D')
+
+@app.route('/api/ssq/omission', methods=['GET'])
+def get_ssq_omission():
+    """双色球红球、蓝球遗漏API"""
+    return _omission_response('ssq', '双色球')
+
+def _stream_games():
+    """解析 games 参数（逗号分隔），未指定时订阅全部彩种"""
+    games = [g for g in request.args.get('games', '').split(',') if g in DRAW_TABLES]
+    return set(games) or None
+
+@app.route('/api/stream', methods=['GET'])
+def stream_draws():
+    """新开奖推送API（Server-Sent Events），支持 Last-Event-ID 断线补发；
+    事件 id 为收到该事件后的游标（如 fc3d:2025280,ssq:2025115）"""
+    games = _stream_games()
+    last_id = request.headers.get('Last-Event-ID')
+    cursor = parse_event_cursor(last_id) if last_id is not None else draw_events.cursor()
+    
+    def generate():
+        yield 'retry: 5000\n\n'
+        nonlocal cursor
+        while True:
+            # 每 15 秒发送一次心跳注释，保持连接不被代理断开
+            found = draw_events.wait(cursor, 15, games)
+            if not found:
+                yield ': ping\n\n'
+                continue
+            for event in found:
+                cursor = advance_event_cursor(cursor, [event])
+                payload = dumps_json({'game': event['game'], 'draw': event['draw']}).decode('utf-8')
+                yield f"id: {format_event_cursor(cursor)}\nevent: draw\ndata: {payload}\n\n"
+    
+    resp = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    resp.headers['Cache-Control'] = 'no-cache'
+    resp.headers['X-Accel-Buffering'] = 'no'
+    return resp
+
+@app.route('/api/poll', methods=['GET'])
+def poll_draws():
+    """新开奖长轮询API（SSE 不可用时的后备）：since 为上次响应中的 lastEventId（游标）"""
+    games = _stream_games()
+    since = request.args.get('since')
+    if since is None:
+        # 首次请求只返回当前游标，之后用它作为 since
+        return jsonify({'success': True, 'events': [], 'lastEventId': format_event_cursor(draw_events.cursor())})
+    
+    cursor = parse_event_cursor(since)
+    timeout = min(max(request.args.get('timeout', 25, type=float), 0), 30)
+    found = draw_events.wait(cursor, timeout, games)
+    return jsonify({
+        'success': True,
+        'events': found,
+        # 只按实际收到的事件前移游标，未订阅的彩种保持原位
+        'lastEventId': format_event_cursor(advance_event_cursor(cursor, found))
+    })
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """健康检查API"""
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'message': '真实彩票数据服务器运行正常'
+        'message': '真实彩票数据服务器运行正常',
+        'sources': scraper.breaker_states(),
+        'ready': coordinator.ready(),
+        'worker': {'pid': os.getpid(), 'role': coordinator.role()}
+    })
+
+@app.route('/api/ready', methods=['GET'])
+def readiness_check():
+    """就绪检查API：缓存预热完成（全部彩种都有数据）前返回 503，供负载均衡滚动发布时判断"""
+    ready = coordinator.ready()
+    return jsonify({
+        'ready': ready,
+        'games': {game: cache.loaded(game) for game in DRAW_TABLES},
+        'worker': {'pid': os.getpid(), 'role': coordinator.role()}
+    }), 200 if ready else 503
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus 文本格式指标"""
+    return Response(metrics.render(), content_type=MetricsRegistry.CONTENT_TYPE)
+
+@app.route('/api/clear_cache', methods=['GET', 'POST'])
+def clear_cache():
+    """清除缓存API：从本地存储重新加载开奖数据，清除分析结果和响应缓存"""
+    coordinator.reload()
+    analysis_cache.clear()
+    response_cache.clear()
+    return jsonify({
+        'success': True,
+        'message': '缓存已重新加载',
+        'data': {'games': {game: cache.loaded(game) for game in DRAW_TABLES}, 'ready': coordinator.ready()}
     })
 
 if __name__ == '__main__':
@@ -556,7 +2709,16 @@ if __name__ == '__main__':
     print("🌐 API地址:")
     print(f"   - 福彩3D: http://localhost:{port}/api/fc3d")
     print(f"   - 双色球: http://localhost:{port}/api/ssq")
+    print(f"   - 统计分析: http://localhost:{port}/api/fc3d/analysis?windows=30,100")
+    print(f"   - 历史导出: http://localhost:{port}/api/fc3d/export?format=csv")
+    print(f"   - 开奖推送: http://localhost:{port}/api/stream")
     print(f"   - 健康检查: http://localhost:{port}/api/health")
+    print(f"   - 就绪检查: http://localhost:{port}/api/ready")
+    print(f"   - 运行指标: http://localhost:{port}/api/metrics")
     print(f"   - 清除缓存: http://localhost:{port}/api/clear_cache")
     
+    # debug 模式下只在重载后的子进程中启动后台任务（含缓存预热），预热完成后才开始接受请求
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background()
+    
     app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file